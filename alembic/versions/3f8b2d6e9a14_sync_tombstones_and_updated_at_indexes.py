@@ -0,0 +1,75 @@
+"""Sync tombstones and updated_at indexes
+
+Revision ID: 3f8b2d6e9a14
+Revises: e7a3f9b1c5d2
+Create Date: 2026-10-18 20:52:59.340269
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from fastapi_users_db_sqlalchemy import GUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8b2d6e9a14"
+down_revision: Union[str, None] = "e7a3f9b1c5d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+UPDATED_AT_INDEXES = (
+    ("ix_todo_owner_id_updated_at", "todo", ["owner_id", "updated_at", "id"]),
+    ("ix_task_owner_id_updated_at", "task", ["owner_id", "updated_at", "id"]),
+    (
+        "ix_shared_todo_user_id_updated_at",
+        "shared_todo",
+        ["user_id", "updated_at", "todo_id"],
+    ),
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tombstone",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", GUID(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["user.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_tombstone_user_id_updated_at",
+        "tombstone",
+        ["user_id", "updated_at", "id"],
+        unique=False,
+    )
+    with op.get_context().autocommit_block():
+        for name, table, columns in UPDATED_AT_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in UPDATED_AT_INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    op.drop_index("ix_tombstone_user_id_updated_at", table_name="tombstone")
+    op.drop_table("tombstone")
@@ -0,0 +1,128 @@
+"""Composite listing indexes
+
+Revision ID: 5b9e0c3d7f21
+Revises: a35079ca7c44
+Create Date: 2026-10-18 19:40:12.104233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# NULL priorities sort last, see app.todo.models.task.SORT_PRIORITY
+SORT_PRIORITY = "coalesce(priority, 2147483647)"
+
+# revision identifiers, used by Alembic.
+revision: str = "5b9e0c3d7f21"
+down_revision: Union[str, None] = "a35079ca7c44"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can not run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_task_owner_id_priority",
+            "task",
+            ["owner_id", sa.text(SORT_PRIORITY), "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_task_todo_id_priority",
+            "task",
+            ["todo_id", sa.text(SORT_PRIORITY), "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_todo_owner_id_id",
+            "todo",
+            ["owner_id", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_task_completed",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_task_title",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_task_priority",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_todo_title",
+            table_name="todo",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_todo_title",
+            "todo",
+            ["title"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_task_priority",
+            "task",
+            ["priority"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_task_title",
+            "task",
+            ["title"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_task_completed",
+            "task",
+            ["completed"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_todo_owner_id_id",
+            table_name="todo",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_task_todo_id_priority",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_task_owner_id_priority",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
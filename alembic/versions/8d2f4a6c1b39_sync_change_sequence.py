@@ -0,0 +1,102 @@
+"""Sync change sequence
+
+Revision ID: 8d2f4a6c1b39
+Revises: 3f8b2d6e9a14
+Create Date: 2026-10-18 23:12:48.905316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d2f4a6c1b39"
+down_revision: Union[str, None] = "3f8b2d6e9a14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHANGE_SEQ_INDEXES = (
+    ("ix_todo_owner_id_change_seq", "todo", ["owner_id", "change_seq", "id"]),
+    ("ix_task_owner_id_change_seq", "task", ["owner_id", "change_seq", "id"]),
+    (
+        "ix_shared_todo_user_id_change_seq",
+        "shared_todo",
+        ["user_id", "change_seq", "todo_id"],
+    ),
+    ("ix_tombstone_user_id_change_seq", "tombstone", ["user_id", "change_seq", "id"]),
+)
+# Only /sync read these, ix_task_owner_id_updated_at stays for updated_since
+UPDATED_AT_INDEXES = (
+    ("ix_todo_owner_id_updated_at", "todo", ["owner_id", "updated_at", "id"]),
+    (
+        "ix_shared_todo_user_id_updated_at",
+        "shared_todo",
+        ["user_id", "updated_at", "todo_id"],
+    ),
+    ("ix_tombstone_user_id_updated_at", "tombstone", ["user_id", "updated_at", "id"]),
+)
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE OR REPLACE FUNCTION stamp_change_seq() RETURNS trigger AS $$ "
+        "BEGIN NEW.change_seq := pg_current_xact_id()::text::bigint; "
+        "RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    for _, table, _ in CHANGE_SEQ_INDEXES:
+        op.add_column(
+            table,
+            sa.Column(
+                "change_seq",
+                sa.BigInteger(),
+                server_default=sa.text("0"),
+                nullable=False,
+            ),
+        )
+        op.execute(
+            f"CREATE TRIGGER {table}_change_seq BEFORE INSERT OR UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()"
+        )
+    with op.get_context().autocommit_block():
+        for name, table, columns in CHANGE_SEQ_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in UPDATED_AT_INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in UPDATED_AT_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table, _ in CHANGE_SEQ_INDEXES:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for _, table, _ in CHANGE_SEQ_INDEXES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_seq ON {table}")
+        op.drop_column(table, "change_seq")
+    op.execute("DROP FUNCTION IF EXISTS stamp_change_seq()")
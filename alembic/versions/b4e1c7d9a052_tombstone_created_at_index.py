@@ -0,0 +1,39 @@
+"""Tombstone created_at index
+
+Revision ID: b4e1c7d9a052
+Revises: 8d2f4a6c1b39
+Create Date: 2026-10-18 23:41:06.118524
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b4e1c7d9a052"
+down_revision: Union[str, None] = "8d2f4a6c1b39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tombstone_created_at",
+            "tombstone",
+            ["created_at"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tombstone_created_at",
+            table_name="tombstone",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
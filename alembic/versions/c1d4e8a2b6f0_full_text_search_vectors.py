@@ -0,0 +1,78 @@
+"""Full text search vectors
+
+The column is added without a default, a catalog only change, and a
+trigger fills it from then on. Existing rows are backfilled in batches of
+their own transaction and the GIN indexes built concurrently, so no step
+rewrites or locks `todo`/`task` for longer than a batch.
+
+Revision ID: c1d4e8a2b6f0
+Revises: 5b9e0c3d7f21
+Create Date: 2026-10-18 20:05:37.512804
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c1d4e8a2b6f0"
+down_revision: Union[str, None] = "5b9e0c3d7f21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    for table in ("todo", "task"):
+        op.add_column(
+            table, sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True)
+        )
+        # See core.db.search.postgresql_search_vector
+        op.execute(
+            f"CREATE TRIGGER {table}_search_vector "
+            f"BEFORE INSERT OR UPDATE OF title, description ON {table} FOR EACH ROW "
+            "EXECUTE FUNCTION tsvector_update_trigger"
+            "(search_vector, 'pg_catalog.english', title, description)"
+        )
+    # CONCURRENTLY can not run inside a transaction block, and every batch
+    # commits on its own
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        for table in ("todo", "task"):
+            last_id = connection.scalar(sa.text(f"SELECT max(id) FROM {table}")) or 0
+            for after in range(0, last_id, BACKFILL_BATCH_SIZE):
+                # Setting title fires the trigger that fills search_vector
+                connection.execute(
+                    sa.text(
+                        f"UPDATE {table} SET title = title "
+                        "WHERE id > :after AND id <= :until AND search_vector IS NULL"
+                    ),
+                    {"after": after, "until": after + BACKFILL_BATCH_SIZE},
+                )
+            op.create_index(
+                f"ix_{table}_search_vector",
+                table,
+                ["search_vector"],
+                unique=False,
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in ("task", "todo"):
+            op.drop_index(
+                f"ix_{table}_search_vector",
+                table_name=table,
+                postgresql_using="gin",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+    for table in ("task", "todo"):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}")
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,35 @@
+"""Touch shared todo on todo update
+
+Revision ID: d6a8f2c4e913
+Revises: b4e1c7d9a052
+Create Date: 2026-10-19 00:07:33.641902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d6a8f2c4e913"
+down_revision: Union[str, None] = "b4e1c7d9a052"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "CREATE OR REPLACE FUNCTION touch_shared_todo() RETURNS trigger AS $$ "
+        "BEGIN UPDATE shared_todo SET updated_at = NEW.updated_at "
+        "WHERE todo_id = NEW.id; RETURN NULL; END $$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        "CREATE TRIGGER todo_touch_shared_todo "
+        "AFTER UPDATE OF owner_id, title, description, updated_at "
+        "ON todo FOR EACH ROW EXECUTE FUNCTION touch_shared_todo()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS todo_touch_shared_todo ON todo")
+    op.execute("DROP FUNCTION IF EXISTS touch_shared_todo()")
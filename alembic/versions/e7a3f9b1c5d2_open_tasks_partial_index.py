@@ -0,0 +1,41 @@
+"""Open tasks partial index
+
+Revision ID: e7a3f9b1c5d2
+Revises: c1d4e8a2b6f0
+Create Date: 2026-10-18 20:31:02.447190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a3f9b1c5d2"
+down_revision: Union[str, None] = "c1d4e8a2b6f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_task_owner_id_open",
+            "task",
+            ["owner_id", sa.text("coalesce(priority, 2147483647)"), "created_at", "id"],
+            unique=False,
+            postgresql_where=sa.text("completed = false"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_task_owner_id_open",
+            table_name="task",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
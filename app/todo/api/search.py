@@ -0,0 +1,19 @@
+from fastapi import Depends, APIRouter, Query
+
+from app.todo.schemas.response import SearchResponseSchema
+from app.todo.services.search import SearchService
+from app.user.auth import current_user
+from app.user.models.user import User
+
+search_router = APIRouter(prefix="/search", tags=["search"])
+
+
+@search_router.get("", response_model=SearchResponseSchema)
+async def search(
+    q: str = Query(min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    user: User = Depends(current_user),
+    search_service: SearchService = Depends(SearchService),
+):
+    """Owned and shared todos and tasks matching `q`, best matches first"""
+    return await search_service.search(user, q, limit)
@@ -1,23 +1,35 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request, Response
 
 from app.todo.schemas.response import SharedTodoResponse, TaskResponseSchema
 from app.todo.services.shared_todo import SharedTodoService
 from app.user.auth import current_user
 from app.user.models.user import User
+from core.conditional import check_etag, make_etag
+from core.db.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 shared_todo_router = APIRouter(prefix="/shared-todo", tags=["shared-todo"])
 
 
 @shared_todo_router.get("/", response_model=List[SharedTodoResponse])
 async def shared_todo(
+    request: Request,
+    response: Response,
     shared_todo_service: SharedTodoService = Depends(SharedTodoService),
     user: User = Depends(current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    result = await shared_todo_service.get_shared_todos(user, skip, limit)
+    """Todos shared with the current user, answers 304 to a current `If-None-Match`"""
+    version = await shared_todo_service.get_shared_todos_version(user)
+    etag = make_etag("shared-todos", version, skip, limit, cursor)
+    check_etag(request, response, etag)
+    result = await shared_todo_service.get_shared_todos(user, skip, limit, cursor)
+    cursor = next_cursor(result, limit, "todo_id")
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
     return result
 
 
@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import Depends, APIRouter
+
+from app.todo.schemas.request import SyncBatchRequestSchema
+from app.todo.schemas.response import SyncBatchResponseSchema, SyncResponseSchema
+from app.todo.services.sync import SyncService
+from app.user.auth import current_user
+from app.user.models.user import User
+
+sync_router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@sync_router.get("", response_model=SyncResponseSchema)
+async def sync(
+    since: Optional[str] = None,
+    user: User = Depends(current_user),
+    sync_service: SyncService = Depends(SyncService),
+):
+    """Todos, tasks and shared todos changed since the `since` cursor, with deletions
+
+    Omit `since` for a full sync, then pass the returned `cursor` back. Keep calling while
+    `has_more` is true, rows may be sent again and should be applied as upserts. A cursor not
+    caught up within the tombstone retention answers 410, start over without `since`.
+    """
+    return await sync_service.sync(user, since)
+
+
+@sync_router.post("/batch", response_model=SyncBatchResponseSchema)
+async def sync_batch(
+    request: SyncBatchRequestSchema,
+    user: User = Depends(current_user),
+    sync_service: SyncService = Depends(SyncService),
+):
+    """Replay queued offline creates, updates and deletes of todos, tasks and shares
+
+    Operations apply in order in one transaction, each gets a result with an HTTP like `status_code`.
+    A create may carry a `temp_id` that later operations use as `id` or `todo_id`, `id_map` maps them
+    to the server ids. An update or delete with `updated_at` older than the row's answers 409.
+    """
+    return await sync_service.apply_batch(request, user)
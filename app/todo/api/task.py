@@ -1,12 +1,23 @@
 from typing import Optional
 
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request, Response
 
-from app.todo.schemas.request import TaskRequestSchema, TaskRequestPartialUpdateSchema
-from app.todo.schemas.response import TaskResponseSchema
+from app.todo.schemas.request import (
+    TaskBulkRequestSchema,
+    TaskBulkUpdateRequestSchema,
+    TaskFilterSchema,
+    TaskRequestSchema,
+    TaskRequestPartialUpdateSchema,
+)
+from app.todo.schemas.response import (
+    TaskBulkUpdateResponseSchema,
+    TaskResponseSchema,
+)
 from app.todo.services.tasks import TaskService
 from app.user.auth import current_user
 from app.user.models.user import User
+from core.conditional import check_etag, make_etag
+from core.db.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 task_router = APIRouter(prefix="/task", tags=["task"])
 
@@ -21,26 +32,72 @@ async def create_task(
     return task
 
 
+@task_router.post("/bulk", response_model=list[TaskResponseSchema])
+async def create_tasks(
+    request: TaskBulkRequestSchema,
+    task_service: TaskService = Depends(TaskService),
+    user: User = Depends(current_user),
+):
+    """Create many tasks in one transaction, the tasks may belong to several of the user's todos"""
+    return await task_service.create_tasks(request, user=user)
+
+
+@task_router.patch("/bulk", response_model=TaskBulkUpdateResponseSchema)
+async def bulk_update(
+    request: TaskBulkUpdateRequestSchema,
+    user: User = Depends(current_user),
+    task_service: TaskService = Depends(TaskService),
+):
+    """Update many tasks in one transaction
+
+    Send `tasks` to apply per task changes and get the updated tasks back, or `filter` and `values`
+    to update every matching task, e.g. complete all tasks of a todo, and get the affected count.
+    """
+    return await task_service.bulk_update(request, user)
+
+
 @task_router.get("/{task_id}", response_model=TaskResponseSchema)
 async def get_task(
+    request: Request,
+    response: Response,
     task_id: int,
     user: User = Depends(current_user),
     task_service: TaskService = Depends(TaskService),
 ):
-    """Get a task item by task_id"""
+    """Get a task item by task_id, answers 304 to a current `If-None-Match`"""
+    version = await task_service.get_tasks_version(user)
+    check_etag(request, response, make_etag("task", task_id, version))
     return await task_service.get_task_by_id(task_id, user)
 
 
 @task_router.get("/", response_model=list[TaskResponseSchema])
 async def get_tasks(
+    request: Request,
+    response: Response,
     todo_id: Optional[int] = None,
+    filters: TaskFilterSchema = Depends(),
     user: User = Depends(current_user),
     task_service: TaskService = Depends(TaskService),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    """Get all tasks related to the current user, this endpoint support infinite scrolling and filter by todo_id"""
-    tasks = await task_service.get_tasks(user, skip, limit, todo_id)
+    """Get all tasks related to the current user, this endpoint support infinite scrolling and filter by todo_id
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page, `skip` is ignored then.
+    Narrow the listing with `completed`, `priority_min`/`priority_max`, `created_after`/`created_before`
+    and `updated_since`, e.g. `?completed=false` for the open tasks.
+    Send the `ETag` back as `If-None-Match` to get an empty 304 while nothing changed.
+    """
+    version = await task_service.get_tasks_version(user)
+    etag = make_etag("tasks", version, todo_id, filters.dict(), skip, limit, cursor)
+    check_etag(request, response, etag)
+    tasks = await task_service.get_tasks(
+        user, skip, limit, todo_id, cursor, filters=filters
+    )
+    cursor = next_cursor(tasks, limit, "priority", "created_at", "id")
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
     return tasks
 
 
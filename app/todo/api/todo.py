@@ -1,13 +1,19 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, Request, Response
 
-from app.todo.schemas.request import SharedTodoRequestSchema, TodoRequestPartialSchema
-from app.todo.schemas.response import TodoResponseSchema
+from app.todo.schemas.request import (
+    SharedTodoBulkRequestSchema,
+    SharedTodoRequestSchema,
+    TodoRequestPartialSchema,
+)
+from app.todo.schemas.response import SharedTodoBulkResponseSchema, TodoResponseSchema
 from app.todo.services.shared_todo import SharedTodoService
 from app.todo.services.todo import TodoRequestSchema, TodoService
 from app.user.auth import current_user
 from app.user.models.user import User
+from core.conditional import check_etag, make_etag
+from core.db.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 todo_router = APIRouter(prefix="/todo", tags=["todo"])
 
@@ -34,13 +40,25 @@ async def get_todo(
 
 @todo_router.get("/", response_model=List[TodoResponseSchema])
 async def get_todos(
+    request: Request,
+    response: Response,
     user: User = Depends(current_user),
     todo_service: TodoService = Depends(TodoService),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
 ):
-    """Get all todos related to the current user, this endpoint support infinite scrolling"""
-    todos = await todo_service.get_todos(user, skip, limit)
+    """Get all todos related to the current user, this endpoint support infinite scrolling
+
+    Pass the `X-Next-Cursor` response header back as `cursor` to fetch the next page, `skip` is ignored then.
+    Send the `ETag` back as `If-None-Match` to get an empty 304 while nothing changed.
+    """
+    version = await todo_service.get_todos_version(user)
+    check_etag(request, response, make_etag("todos", version, skip, limit, cursor))
+    todos = await todo_service.get_todos(user, skip, limit, cursor)
+    cursor = next_cursor(todos, limit, "id")
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
     return todos
 
 
@@ -75,6 +93,17 @@ async def share_todo(
     return await shared_todo_service.share(shared_todo, todo_id, user)
 
 
+@todo_router.post("/{todo_id}/share/bulk/", response_model=SharedTodoBulkResponseSchema)
+async def share_todo_bulk(
+    shared_todo: SharedTodoBulkRequestSchema,
+    todo_id: int,
+    shared_todo_service: SharedTodoService = Depends(SharedTodoService),
+    user: User = Depends(current_user),
+):
+    """Share a todo with many users at once, unknown and already shared e-mails are reported back"""
+    return await shared_todo_service.share_many(shared_todo, todo_id, user)
+
+
 @todo_router.delete("/{todo_id}/unshare/", status_code=204, response_model=None)
 async def unshare_todo(
     todo_id: int,
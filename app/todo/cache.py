@@ -0,0 +1,62 @@
+from importlib import import_module
+from typing import Optional
+
+from pydantic import TypeAdapter
+
+from app.todo.schemas.response import (
+    SharedTodoResponse,
+    TaskResponseSchema,
+    TodoResponseSchema,
+)
+from core.cache import CacheBackend, MemoryBackend, VersionedCache
+from core.cache.bus import InvalidationEvent, invalidation_bus
+from core.db.session import stick_to_primary
+from core.metrics import Counter
+from core.settings.config import settings
+
+
+def create_backend() -> CacheBackend:
+    if settings.response_cache_backend == "memory":
+        return MemoryBackend(
+            max_bytes=settings.response_cache_max_bytes,
+            ttl=settings.response_cache_ttl,
+        )
+    module, _, name = settings.response_cache_backend.rpartition(".")
+    return getattr(import_module(module), name)()
+
+
+# Results of the list endpoints, versioned per user id. Services publish
+# every user whose listings a mutation changes once it committed.
+response_cache = VersionedCache(create_backend())
+Counter(
+    "response_cache_hits",
+    "List responses served from the cache",
+    callback=lambda: response_cache.hits,
+)
+Counter(
+    "response_cache_misses",
+    "List responses loaded from the database",
+    callback=lambda: response_cache.misses,
+)
+Counter(
+    "response_cache_coalesced",
+    "List loads shared with a concurrent identical request",
+    callback=lambda: response_cache.flights.shared,
+)
+
+
+async def evict_listings(event: Optional[InvalidationEvent]) -> None:
+    if event is None:
+        response_cache.clear()
+    else:
+        # Stuck before the bump, a miss under the new version never loads
+        # from a replica that has yet to replay the write
+        stick_to_primary(*event.user_ids)
+        await response_cache.invalidate(*event.user_ids)
+
+
+invalidation_bus.subscribe(evict_listings)
+
+TODO_LIST = TypeAdapter(list[TodoResponseSchema])
+TASK_LIST = TypeAdapter(list[TaskResponseSchema])
+SHARED_TODO_LIST = TypeAdapter(list[SharedTodoResponse])
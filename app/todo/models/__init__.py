@@ -1,3 +1,4 @@
 from app.todo.models.todo import Todo  # noqa
 from app.todo.models.task import Task  # noqa
 from app.todo.models.shared_todo import SharedTodo  # noqa
+from app.todo.models.tombstone import Tombstone  # noqa
@@ -1,17 +1,32 @@
 from fastapi_users_db_sqlalchemy import GUID
-from sqlalchemy import ForeignKey, Column, Integer, UniqueConstraint
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    ForeignKey,
+    Column,
+    Index,
+    Integer,
+    UniqueConstraint,
+    event,
+    text,
+)
 from sqlalchemy.orm import relationship, backref
 
 from core.db import BaseModel
+from core.db.changes import change_tracked
 
 
 class SharedTodo(BaseModel):
     __tablename__ = "shared_todo"
 
-    __table_args__ = (UniqueConstraint("user_id", "todo_id"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "todo_id"),
+        Index("ix_shared_todo_user_id_change_seq", "user_id", "change_seq", "todo_id"),
+    )
 
     user_id = Column(GUID, ForeignKey("user.id"), primary_key=True, index=True)
     todo_id = Column(Integer, ForeignKey("todo.id"), primary_key=True, index=True)
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"))
 
     user = relationship(
         "User", backref=backref("shared_todos", cascade="all, delete-orphan")
@@ -19,3 +34,40 @@ class SharedTodo(BaseModel):
     todo = relationship(
         "Todo", backref=backref("shared_todos", cascade="all, delete-orphan")
     )
+
+
+change_tracked(SharedTodo.__table__)
+
+# An edit of the todo is a change of every membership in it, /sync sends the
+# todo again to its recipients. The change_seq stamping only updates change_seq.
+TOUCH_COLUMNS = "owner_id, title, description, updated_at"
+for statement, dialect in (
+    (
+        "CREATE OR REPLACE FUNCTION touch_shared_todo() RETURNS trigger AS $$ "
+        "BEGIN UPDATE shared_todo SET updated_at = NEW.updated_at "
+        "WHERE todo_id = NEW.id; RETURN NULL; END $$ LANGUAGE plpgsql",
+        "postgresql",
+    ),
+    (
+        f"CREATE TRIGGER todo_touch_shared_todo AFTER UPDATE OF {TOUCH_COLUMNS} "
+        "ON todo FOR EACH ROW EXECUTE FUNCTION touch_shared_todo()",
+        "postgresql",
+    ),
+    (
+        f"CREATE TRIGGER todo_touch_shared_todo AFTER UPDATE OF {TOUCH_COLUMNS} "
+        "ON todo BEGIN UPDATE shared_todo SET updated_at = new.updated_at "
+        "WHERE todo_id = new.id; END",
+        "sqlite",
+    ),
+):
+    event.listen(
+        SharedTodo.__table__, "after_create", DDL(statement).execute_if(dialect=dialect)
+    )
+event.listen(
+    SharedTodo.__table__,
+    "after_drop",
+    # Takes the trigger on todo along
+    DDL("DROP FUNCTION IF EXISTS touch_shared_todo() CASCADE").execute_if(
+        dialect="postgresql"
+    ),
+)
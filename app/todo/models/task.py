@@ -1,19 +1,82 @@
 from fastapi_users_db_sqlalchemy import GUID
-from sqlalchemy import Column, ForeignKey, Integer, String, Text, Boolean
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+    literal_column,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from core.db import BaseModel
+from core.db.changes import change_tracked
+from core.db.search import postgresql_search_vector, search_vector, sqlite_fts
+
+# Listings sort NULL priorities last as the largest integer, the keyset of a
+# page is then one row comparison PostgreSQL range scans the index with,
+# where `priority NULLS LAST` would need an OR it can only filter by
+PRIORITY_LAST = 2147483647
+SORT_PRIORITY = f"coalesce(priority, {PRIORITY_LAST})"
 
 
 class Task(BaseModel):
     __tablename__ = "task"
 
+    # Match the listing queries: filter on owner or todo, then ORDER BY
+    # (sort priority, created_at, id) so pages are read straight off the index
+    __table_args__ = (
+        Index(
+            "ix_task_owner_id_priority",
+            "owner_id",
+            text(SORT_PRIORITY),
+            "created_at",
+            "id",
+        ),
+        Index(
+            "ix_task_todo_id_priority",
+            "todo_id",
+            text(SORT_PRIORITY),
+            "created_at",
+            "id",
+        ),
+        Index("ix_task_owner_id_updated_at", "owner_id", "updated_at", "id"),
+        Index("ix_task_owner_id_change_seq", "owner_id", "change_seq", "id"),
+        # Open tasks only, so the view does not grow with completed tasks
+        Index(
+            "ix_task_owner_id_open",
+            "owner_id",
+            text(SORT_PRIORITY),
+            "created_at",
+            "id",
+            postgresql_where=text("completed = false"),
+        ),
+        Index("ix_task_search_vector", "search_vector", postgresql_using="gin").ddl_if(
+            dialect="postgresql"
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     todo_id = Column(Integer, ForeignKey("todo.id"))
     owner_id = Column(GUID, ForeignKey("user.id"))
-    title = Column(String, index=True)
+    title = Column(String)
     description = Column(Text)
-    priority = Column(Integer, index=True)
-    completed = Column(Boolean, default=False, index=True)
+    priority = Column(Integer)
+    completed = Column(Boolean, default=False)
+    search_vector = search_vector()
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"))
     todo = relationship("Todo", back_populates="tasks")
     owner = relationship("User", back_populates="tasks")
+
+
+# Rendered inline, a bound parameter would not match the index expression
+sort_priority = func.coalesce(Task.priority, literal_column(str(PRIORITY_LAST)))
+
+change_tracked(Task.__table__)
+postgresql_search_vector(Task.__table__, "title", "description")
+task_fts = sqlite_fts(Task.__table__, "title", "description")
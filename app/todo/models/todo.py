@@ -1,18 +1,39 @@
 from fastapi_users_db_sqlalchemy import GUID
-from sqlalchemy import Column, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    Index,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from core.db import BaseModel
+from core.db.changes import change_tracked
+from core.db.search import postgresql_search_vector, search_vector, sqlite_fts
 
 
 class Todo(BaseModel):
     __tablename__ = "todo"
 
+    __table_args__ = (
+        Index("ix_todo_owner_id_id", "owner_id", "id"),
+        Index("ix_todo_owner_id_change_seq", "owner_id", "change_seq", "id"),
+        Index("ix_todo_search_vector", "search_vector", postgresql_using="gin").ddl_if(
+            dialect="postgresql"
+        ),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
 
     owner_id = Column(GUID, ForeignKey("user.id"))
-    title = Column(String, index=True)
+    title = Column(String)
     description = Column(Text)
+    search_vector = search_vector()
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"))
 
     tasks = relationship("Task", back_populates="todo", cascade="all, delete-orphan")
     owner = relationship("User", back_populates="todos")
@@ -24,3 +45,8 @@ class Todo(BaseModel):
 
     def add_shared_with(self, shared_todo) -> None:
         self.shared_with.append(shared_todo)
+
+
+change_tracked(Todo.__table__)
+postgresql_search_vector(Todo.__table__, "title", "description")
+todo_fts = sqlite_fts(Todo.__table__, "title", "description")
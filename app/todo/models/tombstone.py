@@ -0,0 +1,34 @@
+import enum
+
+from fastapi_users_db_sqlalchemy import GUID
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, String, text
+
+from core.db import BaseModel
+from core.db.changes import change_tracked
+
+
+class TombstoneEntity(str, enum.Enum):
+    TODO = "todo"
+    TASK = "task"
+    SHARED_TODO = "shared_todo"
+
+
+class Tombstone(BaseModel):
+    """A deleted row, kept so `GET /sync` can tell clients to drop it"""
+
+    __tablename__ = "tombstone"
+
+    __table_args__ = (
+        Index("ix_tombstone_user_id_change_seq", "user_id", "change_seq", "id"),
+        Index("ix_tombstone_created_at", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(GUID, ForeignKey("user.id"), nullable=False)
+    entity = Column(String, nullable=False)
+    # The todo id for a shared_todo membership
+    entity_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False, server_default=text("0"))
+
+
+change_tracked(Tombstone.__table__)
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.todo.repositories.sync import SyncRepository
+from core.db import session_factory
+from core.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TombstonePruner(object):
+    """
+    Deletes the tombstones of `GET /sync` once they are past `retention`.
+
+    Every worker prunes from the application lifespan, in batches of
+    `batch_size` so no single statement holds locks for long. `SyncService`
+    turns away the cursors that could still be missing a pruned deletion.
+    """
+
+    def __init__(self, retention: timedelta, batch_size: int) -> None:
+        self.retention = retention
+        self.batch_size = batch_size
+        self._pruner: Optional[asyncio.Task] = None
+
+    async def prune(self) -> int:
+        """Delete the expired tombstones, the count deleted"""
+        # created_at is naive UTC, the database clock
+        before = datetime.now(timezone.utc).replace(tzinfo=None) - self.retention
+        pruned = 0
+        async with session_factory() as session:
+            repository = SyncRepository(session)
+            while True:
+                deleted = await repository.prune_tombstones(before, self.batch_size)
+                await repository.commit()
+                pruned += deleted
+                if deleted < self.batch_size:
+                    return pruned
+
+    async def start(self, interval: float) -> None:
+        """Prune every `interval` seconds"""
+        if interval <= 0 or self._pruner is not None:
+            return
+        self._pruner = asyncio.create_task(self._prune(interval))
+
+    async def stop(self) -> None:
+        if self._pruner is None:
+            return
+        self._pruner.cancel()
+        try:
+            await self._pruner
+        except asyncio.CancelledError:
+            pass
+        self._pruner = None
+
+    async def _prune(self, interval: float) -> None:
+        while True:
+            try:
+                await self.prune()
+            except Exception:
+                logger.warning("Could not prune the sync tombstones", exc_info=True)
+            await asyncio.sleep(interval)
+
+
+tombstone_pruner = TombstonePruner(
+    timedelta(days=settings.sync_tombstone_retention_days),
+    settings.sync_tombstone_prune_batch_size,
+)
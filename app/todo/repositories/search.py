@@ -0,0 +1,84 @@
+import abc
+import uuid
+from typing import AsyncGenerator
+
+from fastapi import Depends
+from sqlalchemy import Select, asc, desc, func, literal_column, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.todo.models import SharedTodo, Task, Todo
+from app.todo.models.task import task_fts
+from app.todo.models.todo import todo_fts
+from core.db.search import SEARCH_CONFIG, fts_query
+from core.db.session import get_async_session
+
+
+class SearchRepositoryABC(abc.ABC):
+    @abc.abstractmethod
+    async def search_todos(
+        self, user_id: uuid.UUID, query: str, limit: int
+    ) -> list[Todo]:
+        ...
+
+    @abc.abstractmethod
+    async def search_tasks(
+        self, user_id: uuid.UUID, query: str, limit: int
+    ) -> list[Task]:
+        ...
+
+
+class SearchRepository(SearchRepositoryABC):
+    """
+    Ranked full-text search over what the user owns or was shared.
+
+    PostgreSQL matches the trigger filled `search_vector` columns, SQLite the
+    FTS5 tables mirroring them.
+    """
+
+    def __init__(
+        self, session: AsyncGenerator[AsyncSession, None] = Depends(get_async_session)
+    ) -> None:
+        self.session = session
+
+    async def search_todos(
+        self, user_id: uuid.UUID, query: str, limit: int
+    ) -> list[Todo]:
+        shared = Select(SharedTodo.todo_id).where(SharedTodo.user_id == user_id)
+        statement = Select(Todo).where(
+            or_(Todo.owner_id == user_id, Todo.id.in_(shared))
+        )
+        statement = self._match(statement, Todo, todo_fts, query)
+        if statement is None:
+            return []
+        results = await self.session.execute(statement.limit(limit))
+        return results.scalars().all()
+
+    async def search_tasks(
+        self, user_id: uuid.UUID, query: str, limit: int
+    ) -> list[Task]:
+        shared = Select(SharedTodo.todo_id).where(SharedTodo.user_id == user_id)
+        statement = Select(Task).where(
+            or_(Task.owner_id == user_id, Task.todo_id.in_(shared))
+        )
+        statement = self._match(statement, Task, task_fts, query)
+        if statement is None:
+            return []
+        results = await self.session.execute(statement.limit(limit))
+        return results.scalars().all()
+
+    def _match(self, statement: Select, model, fts, query: str) -> Select | None:
+        """Keep the rows matching `query`, best ranked first"""
+        # The dialect of the engine the query runs on, whatever the settings say
+        if self.session.get_bind(clause=statement).dialect.name == "postgresql":
+            tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+            rank = func.ts_rank(model.search_vector, tsquery)
+            statement = statement.where(model.search_vector.op("@@")(tsquery))
+            return statement.order_by(desc(rank), asc(model.id))
+
+        query = fts_query(query)
+        if not query:
+            return None
+        statement = statement.join(fts, fts.c.rowid == model.id)
+        statement = statement.where(literal_column(fts.name).op("MATCH")(query))
+        # bm25 based, lower is better
+        return statement.order_by(asc(fts.c.rank), asc(model.id))
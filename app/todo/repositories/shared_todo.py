@@ -1,24 +1,36 @@
 import abc
 import uuid
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from fastapi import Depends
-from sqlalchemy import Select, and_, Delete
+from sqlalchemy import Select, and_, Delete, asc, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from app.todo.models import SharedTodo, Todo
+from app.todo.models import SharedTodo, Todo, Tombstone
+from app.todo.models.tombstone import TombstoneEntity
+from core.db.dialects import conflict_insert
 from core.db.session import get_async_session
 
 
 class SharedTodoRepositoryABC(abc.ABC):
     @abc.abstractmethod
-    async def share(self, shared_todo: SharedTodo) -> SharedTodo:
+    async def share(self, todo_id: int, user_id: uuid.UUID) -> SharedTodo:
+        ...
+
+    @abc.abstractmethod
+    async def share_many(
+        self, todo_id: int, user_ids: list[uuid.UUID]
+    ) -> set[uuid.UUID]:
         ...
 
     @abc.abstractmethod
     async def get_shared_todos(
-        self, user_id: uuid.UUID, skip: int, limit: int
+        self,
+        user_id: uuid.UUID,
+        skip: int,
+        limit: int,
+        after: Optional[int] = None,
     ) -> list[SharedTodo]:
         ...
 
@@ -26,6 +38,10 @@ class SharedTodoRepositoryABC(abc.ABC):
     async def get_shared_todo_by_id(self, todo_id: str, user: uuid.UUID) -> SharedTodo:
         ...
 
+    @abc.abstractmethod
+    async def get_shared_user_ids(self, todo_id: int) -> list[uuid.UUID]:
+        ...
+
     @abc.abstractmethod
     async def unshare(self, todo_id: str, user_id: uuid.UUID) -> None:
         ...
@@ -37,33 +53,77 @@ class SharedTodoRepository(SharedTodoRepositoryABC):
     ) -> None:
         self.session = session
 
-    async def share(self, shared_todo: SharedTodo) -> SharedTodo:
-        self.session.add(shared_todo)
+    async def share(self, todo_id: int, user_id: uuid.UUID) -> SharedTodo:
+        statement = (
+            insert(SharedTodo)
+            .values(todo_id=todo_id, user_id=user_id)
+            .returning(SharedTodo)
+        )
+        shared_todo = await self.session.scalar(statement)
         await self.session.commit()
-        await self.session.refresh(shared_todo)
         return shared_todo
 
+    async def share_many(
+        self, todo_id: int, user_ids: list[uuid.UUID]
+    ) -> set[uuid.UUID]:
+        """Share with every user in one statement, returns the users it was newly shared with"""
+        statement = (
+            conflict_insert(self.session, SharedTodo.__table__)
+            .values([{"todo_id": todo_id, "user_id": user_id} for user_id in user_ids])
+            .on_conflict_do_nothing()
+            .returning(SharedTodo.user_id)
+        )
+        results = await self.session.scalars(statement)
+        shared = set(results.all())
+        await self.session.commit()
+        return shared
+
     async def unshare(self, todo_id: str, user_id: uuid.UUID) -> None:
         statement = Delete(SharedTodo).where(
             and_(SharedTodo.todo_id == todo_id, SharedTodo.user_id == user_id)
         )
         result = await self.session.execute(statement)
+        if result.rowcount:
+            await self.session.execute(
+                insert(Tombstone).values(
+                    user_id=user_id,
+                    entity=TombstoneEntity.SHARED_TODO,
+                    entity_id=todo_id,
+                )
+            )
         await self.session.commit()
         return result
 
     async def get_shared_todos(
-        self, user_id: uuid.UUID, skip: int, limit: int
+        self,
+        user_id: uuid.UUID,
+        skip: int,
+        limit: int,
+        after: Optional[int] = None,
     ) -> list[SharedTodo]:
         statement = Select(SharedTodo).where(SharedTodo.user_id == user_id)
         statement = statement.options(
             joinedload(SharedTodo.todo).joinedload(Todo.owner)
         )
-        statement = statement.offset(skip).limit(limit)
+        statement = statement.order_by(asc(SharedTodo.todo_id))
+        if after is not None:
+            statement = statement.where(SharedTodo.todo_id > after)
+        else:
+            statement = statement.offset(skip)
+        statement = statement.limit(limit)
         results = await self.session.execute(statement)
         results = results.scalars().all()
         return results
 
     async def get_shared_todo_by_id(self, todo_id, user: uuid.UUID) -> SharedTodo:
-        statement = Select(SharedTodo).where(and_(SharedTodo.todo_id == todo_id))
+        statement = Select(SharedTodo).where(
+            and_(SharedTodo.todo_id == todo_id, SharedTodo.user_id == user)
+        )
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
+
+    async def get_shared_user_ids(self, todo_id: int) -> list[uuid.UUID]:
+        """The users a todo is shared with"""
+        statement = Select(SharedTodo.user_id).where(SharedTodo.todo_id == todo_id)
+        results = await self.session.scalars(statement)
+        return results.all()
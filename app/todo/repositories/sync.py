@@ -0,0 +1,245 @@
+import abc
+import uuid
+from datetime import datetime
+from typing import AsyncGenerator, Optional
+
+from fastapi import Depends
+from sqlalchemy import Delete, Select, and_, asc, insert, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncSessionTransaction
+from sqlalchemy.orm import joinedload
+
+from app.todo.models import SharedTodo, Task, Todo, Tombstone
+from app.todo.models.tombstone import TombstoneEntity
+from core.db.changes import change_watermark
+from core.db.dialects import conflict_insert
+from core.db.session import get_async_session
+
+# The (change_seq, key) of the last row served
+Keyset = Optional[tuple[int, int]]
+Owned = type[Todo] | type[Task]
+
+
+class SyncRepositoryABC(abc.ABC):
+    @abc.abstractmethod
+    async def get_changed_todos(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Todo]:
+        ...
+
+    @abc.abstractmethod
+    async def get_changed_tasks(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Task]:
+        ...
+
+    @abc.abstractmethod
+    async def get_changed_shared_todos(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[SharedTodo]:
+        ...
+
+    @abc.abstractmethod
+    async def get_tombstones(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Tombstone]:
+        ...
+
+    @abc.abstractmethod
+    async def prune_tombstones(self, before: datetime, limit: int) -> int:
+        ...
+
+    @abc.abstractmethod
+    def savepoint(self) -> AsyncSessionTransaction:
+        ...
+
+    @abc.abstractmethod
+    async def commit(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def create(self, model: Owned, values: dict) -> Todo | Task:
+        ...
+
+    @abc.abstractmethod
+    async def update(
+        self,
+        model: Owned,
+        entity_id: int,
+        user_id: uuid.UUID,
+        values: dict,
+        not_after: Optional[datetime] = None,
+    ) -> Todo | Task | None:
+        ...
+
+    @abc.abstractmethod
+    async def delete(
+        self,
+        model: Owned,
+        entity_id: int,
+        user_id: uuid.UUID,
+        not_after: Optional[datetime] = None,
+    ) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def exists(self, model: Owned, entity_id: int, user_id: uuid.UUID) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def share(self, todo_id: int, user_id: uuid.UUID) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def unshare(self, todo_id: int, user_id: uuid.UUID) -> bool:
+        ...
+
+
+class SyncRepository(SyncRepositoryABC):
+    """
+    Rows of one user changed after a keyset, in commit order, and the writes
+    of `POST /sync/batch`.
+
+    Every listing pages on (change_seq, key) after `after`, the
+    (user, change_seq, key) indexes serve them. Rows at or over the
+    `change_watermark` are held back until every transaction that could
+    still commit below them is over. Writes do not commit, the batch is
+    committed once all its operations ran.
+    """
+
+    def __init__(
+        self, session: AsyncGenerator[AsyncSession, None] = Depends(get_async_session)
+    ) -> None:
+        self.session = session
+
+    async def get_changed_todos(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Todo]:
+        statement = Select(Todo).where(Todo.owner_id == user_id)
+        return await self._changed(statement, Todo.change_seq, Todo.id, after, limit)
+
+    async def get_changed_tasks(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Task]:
+        statement = Select(Task).where(Task.owner_id == user_id)
+        return await self._changed(statement, Task.change_seq, Task.id, after, limit)
+
+    async def get_changed_shared_todos(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[SharedTodo]:
+        statement = (
+            Select(SharedTodo)
+            .where(SharedTodo.user_id == user_id)
+            .options(joinedload(SharedTodo.todo).joinedload(Todo.owner))
+        )
+        return await self._changed(
+            statement, SharedTodo.change_seq, SharedTodo.todo_id, after, limit
+        )
+
+    async def get_tombstones(
+        self, user_id: uuid.UUID, after: Keyset, limit: int
+    ) -> list[Tombstone]:
+        statement = Select(Tombstone).where(Tombstone.user_id == user_id)
+        return await self._changed(
+            statement, Tombstone.change_seq, Tombstone.id, after, limit
+        )
+
+    async def _changed(
+        self, statement: Select, change_seq, key, after: Keyset, limit
+    ) -> list:
+        statement = statement.where(change_seq < change_watermark())
+        if after is not None:
+            statement = statement.where(
+                and_(change_seq >= after[0], tuple_(change_seq, key) > tuple(after))
+            )
+        statement = statement.order_by(asc(change_seq), asc(key)).limit(limit)
+        results = await self.session.execute(statement)
+        return results.unique().scalars().all()
+
+    async def prune_tombstones(self, before: datetime, limit: int) -> int:
+        """Delete up to `limit` tombstones created before `before`, the count deleted"""
+        expired = Select(Tombstone.id).where(Tombstone.created_at < before).limit(limit)
+        result = await self.session.execute(
+            Delete(Tombstone).where(Tombstone.id.in_(expired))
+        )
+        return result.rowcount
+
+    def savepoint(self) -> AsyncSessionTransaction:
+        return self.session.begin_nested()
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def create(self, model: Owned, values: dict) -> Todo | Task:
+        statement = insert(model).values(**values).returning(model)
+        return await self.session.scalar(statement)
+
+    async def update(
+        self,
+        model: Owned,
+        entity_id: int,
+        user_id: uuid.UUID,
+        values: dict,
+        not_after: Optional[datetime] = None,
+    ) -> Todo | Task | None:
+        """Update an owned row, unless it changed after `not_after`"""
+        statement = update(model).where(
+            and_(model.id == entity_id, model.owner_id == user_id)
+        )
+        if not_after is not None:
+            statement = statement.where(model.updated_at <= not_after)
+        statement = statement.values(**values).returning(model)
+        return await self.session.scalar(statement)
+
+    async def delete(
+        self,
+        model: Owned,
+        entity_id: int,
+        user_id: uuid.UUID,
+        not_after: Optional[datetime] = None,
+    ) -> bool:
+        """Delete an owned row and leave its tombstone, unless it changed after `not_after`"""
+        statement = Delete(model).where(
+            and_(model.id == entity_id, model.owner_id == user_id)
+        )
+        if not_after is not None:
+            statement = statement.where(model.updated_at <= not_after)
+        result = await self.session.execute(statement)
+        if not result.rowcount:
+            return False
+        await self.session.execute(
+            insert(Tombstone).values(
+                user_id=user_id, entity=model.__tablename__, entity_id=entity_id
+            )
+        )
+        return True
+
+    async def exists(self, model: Owned, entity_id: int, user_id: uuid.UUID) -> bool:
+        statement = Select(model.id).where(
+            and_(model.id == entity_id, model.owner_id == user_id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def share(self, todo_id: int, user_id: uuid.UUID) -> bool:
+        statement = (
+            conflict_insert(self.session, SharedTodo.__table__)
+            .values(todo_id=todo_id, user_id=user_id)
+            .on_conflict_do_nothing()
+            .returning(SharedTodo.user_id)
+        )
+        return await self.session.scalar(statement) is not None
+
+    async def unshare(self, todo_id: int, user_id: uuid.UUID) -> bool:
+        statement = Delete(SharedTodo).where(
+            and_(SharedTodo.todo_id == todo_id, SharedTodo.user_id == user_id)
+        )
+        result = await self.session.execute(statement)
+        if not result.rowcount:
+            return False
+        await self.session.execute(
+            insert(Tombstone).values(
+                user_id=user_id,
+                entity=TombstoneEntity.SHARED_TODO,
+                entity_id=todo_id,
+            )
+        )
+        return True
@@ -1,12 +1,25 @@
 import abc
 import uuid
+from datetime import datetime
 from typing import AsyncGenerator, Optional
 
 from fastapi import Depends
-from sqlalchemy import Select, and_, Delete, asc
+from sqlalchemy import (
+    Select,
+    and_,
+    Delete,
+    asc,
+    false,
+    insert,
+    true,
+    update,
+    tuple_,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.todo.models import Task, SharedTodo
+from app.todo.models import Task, SharedTodo, Tombstone
+from app.todo.models.task import PRIORITY_LAST, sort_priority
+from app.todo.models.tombstone import TombstoneEntity
 from core.db.session import get_async_session
 
 
@@ -16,7 +29,11 @@ class TaskRepositoryABC(abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def create_task(self, task: Task) -> Task | None:
+    async def create_task(self, values: dict) -> Task | None:
+        ...
+
+    @abc.abstractmethod
+    async def create_tasks(self, values: list[dict]) -> list[Task]:
         ...
 
     @abc.abstractmethod
@@ -27,6 +44,8 @@ class TaskRepositoryABC(abc.ABC):
         limit: int,
         todo_id: Optional[int] = None,
         order_by=asc(Task.created_at),
+        after: Optional[tuple[int | None, datetime, int]] = None,
+        filters: Optional[dict] = None,
     ) -> list[Task] | None:
         ...
 
@@ -35,20 +54,36 @@ class TaskRepositoryABC(abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def partial_update(self, task_id: int, task: Task) -> Task:
+    async def partial_update(
+        self, task_id: int, user_id: uuid.UUID, values: dict
+    ) -> Task | None:
+        ...
+
+    @abc.abstractmethod
+    async def bulk_partial_update(
+        self, user_id: uuid.UUID, values: list[dict]
+    ) -> list[Task]:
+        ...
+
+    @abc.abstractmethod
+    async def update_where(
+        self,
+        user_id: uuid.UUID,
+        values: dict,
+        todo_id: Optional[int] = None,
+        completed: Optional[bool] = None,
+    ) -> int:
         ...
 
     @abc.abstractmethod
     async def get_shared_tasks(
         self,
         user_id: uuid.UUID,
-        shared_todo: SharedTodo,
         todo_id: int,
         skip: int,
         limit: int,
-        order_by=asc(Task.created_at),
-    ):
-        pass
+    ) -> list[Task]:
+        ...
 
 
 class TaskRepository(TaskRepositoryABC):
@@ -64,30 +99,95 @@ class TaskRepository(TaskRepositoryABC):
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
 
-    async def create_task(self, task: Task) -> Task | None:
-        self.session.add(task)
+    async def create_task(self, values: dict) -> Task | None:
+        statement = insert(Task).values(**values).returning(Task)
+        task = await self.session.scalar(statement)
         await self.session.commit()
-        await self.session.refresh(task)
         return task
 
+    async def create_tasks(self, values: list[dict]) -> list[Task]:
+        """Insert all rows with batched multi-row INSERT ... RETURNING in one transaction"""
+        statement = insert(Task).returning(Task, sort_by_parameter_order=True)
+        results = await self.session.scalars(statement, values)
+        tasks = results.all()
+        await self.session.commit()
+        return tasks
+
+    async def bulk_partial_update(
+        self, user_id: uuid.UUID, values: list[dict]
+    ) -> list[Task]:
+        """
+        Apply per task changes, each dict holds the task `id` and its changed fields.
+
+        Tasks not owned by the user are skipped. Changes touching the same
+        fields are sent as one executemany UPDATE by primary key.
+        """
+        changes: dict[int, dict] = {}
+        for item in values:
+            changes.setdefault(item["id"], {}).update(item)
+
+        statement = Select(Task.id).where(
+            and_(Task.id.in_(changes), Task.owner_id == user_id)
+        )
+        owned = set((await self.session.scalars(statement)).all())
+
+        batches: dict[frozenset, list[dict]] = {}
+        for task_id in owned:
+            if len(changes[task_id]) > 1:
+                batches.setdefault(frozenset(changes[task_id]), []).append(
+                    changes[task_id]
+                )
+        for batch in batches.values():
+            await self.session.execute(update(Task), batch)
+
+        statement = (
+            Select(Task)
+            .where(Task.id.in_(owned))
+            .order_by(asc(Task.id))
+            .execution_options(populate_existing=True)
+        )
+        tasks = (await self.session.scalars(statement)).all()
+        await self.session.commit()
+        return tasks
+
+    async def update_where(
+        self,
+        user_id: uuid.UUID,
+        values: dict,
+        todo_id: Optional[int] = None,
+        completed: Optional[bool] = None,
+    ) -> int:
+        statement = update(Task).where(Task.owner_id == user_id)
+        if todo_id is not None:
+            statement = statement.where(Task.todo_id == todo_id)
+        if completed is not None:
+            statement = statement.where(Task.completed == completed)
+        statement = statement.values(**values).execution_options(
+            synchronize_session=False
+        )
+        result = await self.session.execute(statement)
+        await self.session.commit()
+        return result.rowcount
+
     async def get_shared_tasks(
         self,
         user_id: uuid.UUID,
-        shared_todo: SharedTodo,
         todo_id: int,
         skip: int,
         limit: int,
-        order_by=asc(Task.created_at),
-    ):
-        statement = Select(Task)
-        statement = statement.order_by(asc(Task.priority), asc(Task.created_at))
-        if todo_id is not None:
-            statement = statement.where(and_(Task.todo_id == todo_id))
+    ) -> list[Task]:
+        """Tasks of a todo shared with the user, the join only keeps what the user may see"""
+        statement = Select(Task).join(
+            SharedTodo,
+            and_(SharedTodo.todo_id == Task.todo_id, SharedTodo.user_id == user_id),
+        )
+        statement = statement.where(Task.todo_id == todo_id)
+        statement = statement.order_by(
+            asc(sort_priority), asc(Task.created_at), asc(Task.id)
+        )
         statement = statement.offset(skip).limit(limit)
-        print(statement)
         results = await self.session.execute(statement)
-        results = results.scalars().all()
-        return results
+        return results.scalars().all()
 
     async def get_tasks(
         self,
@@ -96,24 +196,90 @@ class TaskRepository(TaskRepositoryABC):
         limit: int,
         todo_id: Optional[int] = None,
         order_by=asc(Task.created_at),
+        after: Optional[tuple[int | None, datetime, int]] = None,
+        filters: Optional[dict] = None,
     ) -> list[Task] | None:
         statement = Select(Task).where(Task.owner_id == user_id)
-        statement = statement.order_by(asc(Task.priority), asc(Task.created_at))
+        statement = statement.order_by(
+            asc(sort_priority), asc(Task.created_at), asc(Task.id)
+        )
         if todo_id is not None:
             statement = statement.where(and_(Task.todo_id == todo_id))
-        statement = statement.offset(skip).limit(limit)
+        if filters:
+            statement = statement.where(*self._filters(**filters))
+        if after is not None:
+            statement = statement.where(self._after(*after))
+        else:
+            statement = statement.offset(skip)
+        statement = statement.limit(limit)
         results = await self.session.execute(statement)
         return results.scalars().all()
 
+    @staticmethod
+    def _filters(
+        completed: Optional[bool] = None,
+        priority_min: Optional[int] = None,
+        priority_max: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        updated_since: Optional[datetime] = None,
+    ) -> list:
+        """
+        Predicates of the `GET /task/` filters, None values are ignored.
+
+        `completed` is compared to a literal so the open tasks listing can
+        use the `completed = false` partial index.
+        """
+        conditions = []
+        if completed is not None:
+            conditions.append(Task.completed == (true() if completed else false()))
+        if priority_min is not None:
+            conditions.append(Task.priority >= priority_min)
+        if priority_max is not None:
+            conditions.append(Task.priority <= priority_max)
+        if created_after is not None:
+            conditions.append(Task.created_at > created_after)
+        if created_before is not None:
+            conditions.append(Task.created_at < created_before)
+        if updated_since is not None:
+            conditions.append(Task.updated_at >= updated_since)
+        return conditions
+
+    @staticmethod
+    def _after(priority: int | None, created_at: datetime, task_id: int):
+        """Keyset predicate for rows sorted after (priority, created_at, id)."""
+        priority = PRIORITY_LAST if priority is None else priority
+        return tuple_(sort_priority, Task.created_at, Task.id) > (
+            priority,
+            created_at,
+            task_id,
+        )
+
     async def delete_task_by_id(self, task_id: int, user_id: uuid.UUID) -> None:
         statement = Delete(Task).where(
             and_(Task.id == task_id, Task.owner_id == user_id)
         )
         result = await self.session.execute(statement)
+        if result.rowcount:
+            await self.session.execute(
+                insert(Tombstone).values(
+                    user_id=user_id, entity=TombstoneEntity.TASK, entity_id=task_id
+                )
+            )
         await self.session.commit()
         return result
 
-    async def partial_update(self, task_id: int, task: Task) -> Task:
+    async def partial_update(
+        self, task_id: int, user_id: uuid.UUID, values: dict
+    ) -> Task | None:
+        if not values:
+            return await self.get_task_by_id(task_id, user_id)
+        statement = (
+            update(Task)
+            .where(and_(Task.id == task_id, Task.owner_id == user_id))
+            .values(**values)
+            .returning(Task)
+        )
+        task = await self.session.scalar(statement)
         await self.session.commit()
-        await self.session.refresh(task)
         return task
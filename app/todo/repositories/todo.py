@@ -1,12 +1,13 @@
 import abc
 import uuid
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from fastapi import Depends
-from sqlalchemy import Select, and_, Delete
+from sqlalchemy import Select, and_, Delete, asc, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.todo.models import Todo
+from app.todo.models import Todo, Tombstone
+from app.todo.models.tombstone import TombstoneEntity
 from core.db.session import get_async_session
 
 
@@ -16,12 +17,22 @@ class TodoRepositoryABC(abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def create_todo(self, todo: Todo) -> Todo | None:
+    async def get_owned_todo_ids(
+        self, todo_ids: set[int], user_id: uuid.UUID
+    ) -> set[int]:
+        ...
+
+    @abc.abstractmethod
+    async def create_todo(self, values: dict) -> Todo | None:
         ...
 
     @abc.abstractmethod
     async def get_todos(
-        self, user_id: uuid.UUID, skip: int, limit: int
+        self,
+        user_id: uuid.UUID,
+        skip: int,
+        limit: int,
+        after: Optional[int] = None,
     ) -> list[Todo] | None:
         ...
 
@@ -30,7 +41,9 @@ class TodoRepositoryABC(abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def partial_update(self, todo_id: int, todo: Todo) -> Todo:
+    async def partial_update(
+        self, todo_id: int, user_id: uuid.UUID, values: dict
+    ) -> Todo | None:
         ...
 
 
@@ -47,18 +60,36 @@ class TodoRepository(TodoRepositoryABC):
         results = await self.session.execute(statement)
         return results.unique().scalar_one_or_none()
 
+    async def get_owned_todo_ids(
+        self, todo_ids: set[int], user_id: uuid.UUID
+    ) -> set[int]:
+        statement = Select(Todo.id).where(
+            and_(Todo.id.in_(todo_ids), Todo.owner_id == user_id)
+        )
+        results = await self.session.scalars(statement)
+        return set(results.all())
+
     async def get_todos(
-        self, user_id: uuid.UUID, skip: int, limit: int
+        self,
+        user_id: uuid.UUID,
+        skip: int,
+        limit: int,
+        after: Optional[int] = None,
     ) -> list[Todo] | None:
         statement = Select(Todo).where(and_(Todo.owner_id == user_id))
-        statement = statement.offset(skip).limit(limit)
+        statement = statement.order_by(asc(Todo.id))
+        if after is not None:
+            statement = statement.where(Todo.id > after)
+        else:
+            statement = statement.offset(skip)
+        statement = statement.limit(limit)
         results = await self.session.execute(statement)
         return results.scalars().all()
 
-    async def create_todo(self, todo: Todo) -> Todo | None:
-        self.session.add(todo)
+    async def create_todo(self, values: dict) -> Todo | None:
+        statement = insert(Todo).values(**values).returning(Todo)
+        todo = await self.session.scalar(statement)
         await self.session.commit()
-        await self.session.refresh(todo)
         return todo
 
     async def delete_todo_by_id(self, todo_id: int, user_id: uuid.UUID) -> None:
@@ -66,10 +97,26 @@ class TodoRepository(TodoRepositoryABC):
             and_(Todo.id == todo_id, Todo.owner_id == user_id)
         )
         result = await self.session.execute(statement)
+        if result.rowcount:
+            await self.session.execute(
+                insert(Tombstone).values(
+                    user_id=user_id, entity=TombstoneEntity.TODO, entity_id=todo_id
+                )
+            )
         await self.session.commit()
         return result
 
-    async def partial_update(self, todo_id: int, todo: Todo) -> Todo:
+    async def partial_update(
+        self, todo_id: int, user_id: uuid.UUID, values: dict
+    ) -> Todo | None:
+        if not values:
+            return await self.get_todo_by_id(todo_id, user_id)
+        statement = (
+            update(Todo)
+            .where(and_(Todo.id == todo_id, Todo.owner_id == user_id))
+            .values(**values)
+            .returning(Todo)
+        )
+        todo = await self.session.scalar(statement)
         await self.session.commit()
-        await self.session.refresh(todo)
         return todo
@@ -1,3 +1,11 @@
+from typing import Annotated
+
+from pydantic import Field
+
+# The range of an INTEGER column, larger values fail in the database
+Int32 = Annotated[int, Field(ge=-(2**31), le=2**31 - 1)]
+
+
 class CommonTodoTasksMixin(object):
     title: str
     description: str
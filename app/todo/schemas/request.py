@@ -1,8 +1,10 @@
-from typing import Optional
+from datetime import datetime
+from typing import Literal, Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
 
-from app.todo.schemas.common import CommonTodoTasksMixin
+from app.todo.schemas.common import CommonTodoTasksMixin, Int32
+from core.settings.config import settings
 
 
 class TodoRequestSchema(CommonTodoTasksMixin, BaseModel):
@@ -15,17 +17,105 @@ class TodoRequestPartialSchema(BaseModel):
 
 
 class TaskRequestSchema(CommonTodoTasksMixin, BaseModel):
-    todo_id: int
-    priority: Optional[int]
+    todo_id: Int32
+    priority: Optional[Int32]
+
+
+class TaskFilterSchema(BaseModel):
+    completed: Optional[bool] = None
+    priority_min: Optional[Int32] = None
+    priority_max: Optional[Int32] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    updated_since: Optional[datetime] = None
+
+
+class TaskBulkRequestSchema(BaseModel):
+    tasks: list[TaskRequestSchema] = Field(
+        min_length=1, max_length=settings.task_bulk_max_size
+    )
 
 
 class SharedTodoRequestSchema(BaseModel):
     email: EmailStr
 
 
+class SharedTodoBulkRequestSchema(BaseModel):
+    emails: list[EmailStr] = Field(
+        min_length=1, max_length=settings.share_bulk_max_size
+    )
+
+
 class TaskRequestPartialUpdateSchema(BaseModel):
-    todo_id: Optional[int] = None
-    priority: Optional[int] = None
+    todo_id: Optional[Int32] = None
+    priority: Optional[Int32] = None
     completed: Optional[bool] = None
     title: Optional[str] = None
     description: Optional[str] = None
+
+    @field_validator("todo_id")
+    @classmethod
+    def check_todo_id(cls, todo_id: Optional[int]) -> int:
+        # Omit todo_id to keep it, a task always belongs to a todo
+        if todo_id is None:
+            raise ValueError("todo_id can not be null")
+        return todo_id
+
+
+class TaskBulkUpdateItemSchema(TaskRequestPartialUpdateSchema):
+    id: Int32
+
+
+class TaskBulkUpdateFilterSchema(BaseModel):
+    todo_id: Optional[Int32] = None
+    completed: Optional[bool] = None
+
+
+class TaskBulkUpdateRequestSchema(BaseModel):
+    """Either a list of per task changes, or one change applied to every matching task"""
+
+    tasks: Optional[list[TaskBulkUpdateItemSchema]] = Field(
+        default=None, min_length=1, max_length=settings.task_bulk_max_size
+    )
+    filter: Optional[TaskBulkUpdateFilterSchema] = None
+    values: Optional[TaskRequestPartialUpdateSchema] = None
+
+    @model_validator(mode="after")
+    def check_form(self) -> "TaskBulkUpdateRequestSchema":
+        if (self.tasks is None) == (self.filter is None):
+            raise ValueError("Provide either tasks or filter")
+        if self.filter is not None and (
+            self.values is None or not self.values.dict(exclude_unset=True)
+        ):
+            raise ValueError("A filter requires values to apply")
+        if self.tasks is not None and self.values is not None:
+            raise ValueError("Per task changes take no values, set them on each task")
+        return self
+
+
+class SyncOperationSchema(BaseModel):
+    """
+    One offline mutation. `id` and a `todo_id` in `values` are server ids, or
+    the `temp_id` of a create earlier in the same batch.
+    """
+
+    op: Literal["create", "update", "delete"]
+    entity: Literal["todo", "task", "share"]
+    id: Optional[Int32 | str] = None
+    temp_id: Optional[str] = None
+    values: dict = {}
+    # When the client made the change, an update or delete older than the
+    # row's updated_at loses (last writer wins)
+    updated_at: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_id(self) -> "SyncOperationSchema":
+        if self.op != "create" and self.id is None:
+            raise ValueError(f"{self.op} requires an id")
+        return self
+
+
+class SyncBatchRequestSchema(BaseModel):
+    operations: list[SyncOperationSchema] = Field(
+        min_length=1, max_length=settings.sync_batch_max_size
+    )
@@ -2,7 +2,7 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class UserEmail(BaseModel):
@@ -29,6 +29,12 @@ class TaskResponseSchema(BaseModel):
     completed: Optional[bool] = None
 
 
+class TaskBulkUpdateResponseSchema(BaseModel):
+    updated: int
+    tasks: list[TaskResponseSchema] = []
+    not_found: list[int] = []
+
+
 class SharedTodoUserResponseSchema(BaseModel):
     email: str
 
@@ -42,6 +48,44 @@ class SharedTodoResponseSchema(BaseModel):
     owner: SharedTodoUserResponseSchema
 
 
+class SharedTodoBulkResponseSchema(BaseModel):
+    shared: list[str]
+    already_shared: list[str]
+    unknown: list[str]
+
+
 class SharedTodoResponse(BaseModel):
     todo: SharedTodoResponseSchema
     todo_id: int
+
+
+class SearchResponseSchema(BaseModel):
+    todos: list[TodoResponseSchema]
+    tasks: list[TaskResponseSchema]
+
+
+class TombstoneResponseSchema(BaseModel):
+    entity: str
+    entity_id: int
+    deleted_at: datetime = Field(validation_alias="updated_at")
+
+
+class SyncResponseSchema(BaseModel):
+    todos: list[TodoResponseSchema]
+    tasks: list[TaskResponseSchema]
+    shared_todos: list[SharedTodoResponse]
+    deleted: list[TombstoneResponseSchema]
+    cursor: str
+    has_more: bool
+
+
+class SyncOperationResultSchema(BaseModel):
+    status_code: int
+    id: Optional[int] = None
+    temp_id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class SyncBatchResponseSchema(BaseModel):
+    results: list[SyncOperationResultSchema]
+    id_map: dict[str, int]
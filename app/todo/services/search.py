@@ -0,0 +1,17 @@
+from fastapi import Depends
+
+from app.todo.repositories.search import SearchRepository, SearchRepositoryABC
+from app.user.models.user import User
+
+
+class SearchService(object):
+    def __init__(
+        self, search_repository: SearchRepositoryABC = Depends(SearchRepository)
+    ):
+        self.search_repository = search_repository
+
+    async def search(self, user: User, query: str, limit: int) -> dict[str, list]:
+        return {
+            "todos": await self.search_repository.search_todos(user.id, query, limit),
+            "tasks": await self.search_repository.search_tasks(user.id, query, limit),
+        }
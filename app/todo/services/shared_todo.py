@@ -1,5 +1,8 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException
 
+from app.todo.cache import SHARED_TODO_LIST, response_cache
 from app.todo.models import SharedTodo, Todo, Task
 from app.todo.repositories.shared_todo import (
     SharedTodoRepository,
@@ -7,9 +10,15 @@ from app.todo.repositories.shared_todo import (
 )
 from app.todo.repositories.task import TaskRepository, TaskRepositoryABC
 from app.todo.repositories.todo import TodoRepository, TodoRepositoryABC
-from app.todo.schemas.request import SharedTodoRequestSchema
+from app.todo.schemas.request import (
+    SharedTodoBulkRequestSchema,
+    SharedTodoRequestSchema,
+)
+from app.todo.schemas.response import SharedTodoResponse
 from app.user.auth import get_user_manager
 from app.user.models.user import UserManager, User
+from core.cache.bus import invalidation_bus
+from core.db.pagination import decode_id_cursor
 
 
 class SharedTodoService(object):
@@ -36,19 +45,59 @@ class SharedTodoService(object):
         if user is None:
             raise HTTPException(status_code=403, detail="Operation not permitted")
 
-        shared_todo: SharedTodo = SharedTodo()
-        shared_todo.user_id = user.id
-        shared_todo.todo_id = todo.id
-        return await self.shared_todo_repository.share(shared_todo)
+        result = await self.shared_todo_repository.share(todo.id, user.id)
+        await invalidation_bus.publish("shared_todo", todo.id, [user.id])
+        return result
+
+    async def share_many(
+        self, request: SharedTodoBulkRequestSchema, todo_id: int, user: User
+    ) -> dict[str, list[str]]:
+        """Share a todo with many users, reporting unknown and already shared e-mails"""
+        todo: Todo = await self.todo_repository.get_todo_by_id(todo_id, user.id)
+        if todo is None:
+            raise HTTPException(status_code=404, detail="Todo does not exist")
+
+        emails = list(dict.fromkeys(request.emails))
+        user_ids = await self.user_repository.get_ids_by_emails(emails)
+        shared = set()
+        if user_ids:
+            shared = await self.shared_todo_repository.share_many(
+                todo.id, list(dict.fromkeys(user_ids.values()))
+            )
+            await invalidation_bus.publish("shared_todo", todo.id, shared)
+        return {
+            "shared": [email for email in emails if user_ids.get(email) in shared],
+            "already_shared": [
+                email
+                for email in emails
+                if email in user_ids and user_ids[email] not in shared
+            ],
+            "unknown": [email for email in emails if email not in user_ids],
+        }
 
     async def unshare(self, todo_id, user):
         """Simpley delete the shared_todo record from the database"""
-        return await self.shared_todo_repository.unshare(todo_id, user.id)
+        result = await self.shared_todo_repository.unshare(todo_id, user.id)
+        await invalidation_bus.publish("shared_todo", todo_id, [user.id])
+        return result
 
     async def get_shared_todos(
-        self, user: User, skip: int, limit: int
-    ) -> list[SharedTodo]:
-        return await self.shared_todo_repository.get_shared_todos(user.id, skip, limit)
+        self, user: User, skip: int, limit: int, cursor: Optional[str] = None
+    ) -> list[SharedTodoResponse]:
+        after = decode_id_cursor(cursor) if cursor is not None else None
+        return await response_cache.get_or_load(
+            user.id,
+            "shared_todos",
+            (skip, limit, after),
+            SHARED_TODO_LIST,
+            lambda: self.shared_todo_repository.get_shared_todos(
+                user.id, skip, limit, after=after
+            ),
+            coalesce=True,
+        )
+
+    async def get_shared_todos_version(self, user: User) -> str:
+        return await response_cache.version(user.id)
 
     async def get_shared_todo_by_id(
         self, todo_id: int, user: User
@@ -58,11 +107,13 @@ class SharedTodoService(object):
     async def get_shared_todo_tasks(
         self, user: User, todo_id, skip: int, limit: int
     ) -> list[Task]:
-        shared_todo = await self.shared_todo_repository.get_shared_todo_by_id(
-            todo_id, user.id
+        tasks = await self.task_repository.get_shared_tasks(
+            user.id, todo_id, skip, limit
         )
-        if shared_todo is None:
+        # Only an empty page needs telling "nothing left" from "not shared"
+        if not tasks and (
+            await self.shared_todo_repository.get_shared_todo_by_id(todo_id, user.id)
+            is None
+        ):
             raise HTTPException(status_code=404, detail="Shared todo not found")
-        return await self.task_repository.get_shared_tasks(
-            user.id, shared_todo, todo_id, skip, limit
-        )
+        return tasks
@@ -0,0 +1,259 @@
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+
+from app.todo.models import Task, Todo
+from app.todo.repositories.shared_todo import (
+    SharedTodoRepository,
+    SharedTodoRepositoryABC,
+)
+from app.todo.repositories.sync import Keyset, SyncRepository, SyncRepositoryABC
+from app.todo.repositories.todo import TodoRepository, TodoRepositoryABC
+from app.todo.schemas.request import (
+    SharedTodoRequestSchema,
+    SyncBatchRequestSchema,
+    SyncOperationSchema,
+    TaskRequestPartialUpdateSchema,
+    TaskRequestSchema,
+    TodoRequestPartialSchema,
+    TodoRequestSchema,
+)
+from app.user.auth import get_user_manager
+from app.user.models.user import User, UserManager
+from core.cache.bus import invalidation_bus
+from core.db import unit_of_work
+from core.db.pagination import InvalidCursor, decode_cursor, encode_cursor
+from core.settings.config import settings
+
+ENTITIES = {
+    "todo": (Todo, TodoRequestSchema, TodoRequestPartialSchema),
+    "task": (Task, TaskRequestSchema, TaskRequestPartialUpdateSchema),
+}
+
+
+class SyncService(object):
+    def __init__(
+        self,
+        sync_repository: SyncRepositoryABC = Depends(SyncRepository),
+        todo_repository: TodoRepositoryABC = Depends(TodoRepository),
+        user_repository: UserManager = Depends(get_user_manager),
+        shared_todo_repository: SharedTodoRepositoryABC = Depends(SharedTodoRepository),
+    ):
+        self.sync_repository = sync_repository
+        self.todo_repository = todo_repository
+        self.user_repository = user_repository
+        self.shared_todo_repository = shared_todo_repository
+
+    async def sync(self, user: User, cursor: Optional[str] = None) -> dict:
+        """
+        Changes of the user's todos, tasks, shared todos and deletions since `cursor`.
+
+        Each stream resumes right after the last row it served. Rows come in
+        commit order, a transaction that started early but committed late is
+        held back instead of landing behind a cursor that already moved past it.
+        The cursor also carries when the client was last caught up, once that
+        is past the tombstone retention deletions may be missing and it answers
+        410, the client has to sync from scratch.
+        """
+        now = int(time.time())
+        if cursor is None:
+            after, caught_up_at = [(0, 0)] * 4, now
+        else:
+            after, caught_up_at = self._decode_cursor(cursor)
+            retention = settings.sync_tombstone_retention_days * 24 * 60 * 60
+            if caught_up_at < now - retention:
+                raise HTTPException(
+                    status_code=410, detail="Cursor expired, full resync required"
+                )
+        limit = settings.sync_page_size
+        pages = [
+            await self.sync_repository.get_changed_todos(user.id, after[0], limit),
+            await self.sync_repository.get_changed_tasks(user.id, after[1], limit),
+            await self.sync_repository.get_changed_shared_todos(
+                user.id, after[2], limit
+            ),
+            await self.sync_repository.get_tombstones(user.id, after[3], limit),
+        ]
+        keysets = list(after)
+        for i, (rows, key) in enumerate(zip(pages, ("id", "id", "todo_id", "id"))):
+            if rows:
+                keysets[i] = (rows[-1].change_seq, getattr(rows[-1], key))
+        has_more = any(len(rows) == limit for rows in pages)
+        todos, tasks, shared_todos, deleted = pages
+        return {
+            "todos": todos,
+            "tasks": tasks,
+            "shared_todos": shared_todos,
+            "deleted": deleted,
+            "cursor": encode_cursor(
+                *(value for keyset in keysets for value in keyset),
+                caught_up_at if has_more else now,
+            ),
+            "has_more": has_more,
+        }
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[list[Keyset], int]:
+        try:
+            values = [int(value) for value in decode_cursor(cursor, 9)]
+            return [(values[i], values[i + 1]) for i in range(0, 8, 2)], values[8]
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+
+    @unit_of_work
+    async def apply_batch(self, request: SyncBatchRequestSchema, user: User) -> dict:
+        """
+        Apply offline mutations in order and in one transaction.
+
+        Every operation runs in a savepoint, a failing one is reported in its
+        result and the others still apply. A create may carry a `temp_id`
+        that later operations use in place of the server id.
+        """
+        id_map: dict[str, int] = {}
+        # Users whose listings the batch changed, besides the user
+        touched = set()
+        results = []
+        for operation in request.operations:
+            result = {"temp_id": operation.temp_id}
+            try:
+                async with self.sync_repository.savepoint():
+                    result.update(await self._apply(operation, user, id_map, touched))
+            except HTTPException as e:
+                result.update(status_code=e.status_code, detail=e.detail)
+            except ValidationError as e:
+                result.update(status_code=422, detail=self._describe(e))
+            except DBAPIError as e:
+                # Bad values, e.g. out of range, fail alone. A lost connection
+                # fails the batch, no later operation could run on it
+                if e.connection_invalidated:
+                    raise
+                result.update(
+                    status_code=422, detail="Violation Error, Request was not processed"
+                )
+            results.append(result)
+        await self.sync_repository.commit()
+        await invalidation_bus.publish("sync", None, [user.id, *touched])
+        return {"results": results, "id_map": id_map}
+
+    async def _apply(
+        self,
+        operation: SyncOperationSchema,
+        user: User,
+        id_map: dict[str, int],
+        touched: set,
+    ) -> dict:
+        if operation.entity == "share":
+            return await self._apply_share(operation, user, id_map, touched)
+
+        model, create_schema, update_schema = ENTITIES[operation.entity]
+        values = dict(operation.values)
+        if "todo_id" in values:
+            values["todo_id"] = self._resolve(values["todo_id"], id_map)
+
+        if operation.op == "create":
+            values = create_schema(**values).dict()
+            if model is Task:
+                await self._check_todo_owned(values["todo_id"], user)
+            row = await self.sync_repository.create(
+                model, {**values, "owner_id": user.id}
+            )
+            if operation.temp_id is not None:
+                id_map[operation.temp_id] = row.id
+            return {"status_code": 201, "id": row.id}
+
+        entity_id = self._resolve(operation.id, id_map)
+        not_after = self._as_utc(operation.updated_at)
+        if model is Todo and isinstance(entity_id, int):
+            touched.update(
+                await self.shared_todo_repository.get_shared_user_ids(entity_id)
+            )
+        if operation.op == "delete":
+            found = await self.sync_repository.delete(
+                model, entity_id, user.id, not_after
+            )
+        else:
+            values = update_schema(**values).dict(exclude_unset=True)
+            if values.get("todo_id") is not None:
+                await self._check_todo_owned(values["todo_id"], user)
+            if values:
+                found = await self.sync_repository.update(
+                    model, entity_id, user.id, values, not_after
+                )
+            else:
+                found = await self.sync_repository.exists(model, entity_id, user.id)
+
+        if not found:
+            if not_after is not None and await self.sync_repository.exists(
+                model, entity_id, user.id
+            ):
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"{operation.entity.capitalize()} changed since {operation.updated_at}",
+                )
+            raise HTTPException(
+                status_code=404, detail=f"{operation.entity.capitalize()} not found"
+            )
+        return {"status_code": 200, "id": entity_id}
+
+    async def _apply_share(
+        self,
+        operation: SyncOperationSchema,
+        user: User,
+        id_map: dict[str, int],
+        touched: set,
+    ) -> dict:
+        """Share a todo the user owns by e-mail, or leave a todo shared with the user"""
+        if operation.op == "update":
+            raise HTTPException(status_code=422, detail="A share can not be updated")
+
+        if operation.op == "delete":
+            todo_id = self._resolve(operation.id, id_map)
+            if not await self.sync_repository.unshare(todo_id, user.id):
+                raise HTTPException(status_code=404, detail="Shared todo not found")
+            return {"status_code": 200, "id": todo_id}
+
+        request = SharedTodoRequestSchema(**operation.values)
+        todo_id = self._resolve(operation.values.get("todo_id"), id_map)
+        await self._check_todo_owned(todo_id, user)
+        user_ids = await self.user_repository.get_ids_by_emails([request.email])
+        if not user_ids:
+            raise HTTPException(status_code=403, detail="Operation not permitted")
+        recipient = next(iter(user_ids.values()))
+        created = await self.sync_repository.share(todo_id, recipient)
+        touched.add(recipient)
+        return {"status_code": 201 if created else 200, "id": todo_id}
+
+    async def _check_todo_owned(self, todo_id, user: User) -> None:
+        if not isinstance(
+            todo_id, int
+        ) or not await self.todo_repository.get_owned_todo_ids({todo_id}, user.id):
+            raise HTTPException(status_code=404, detail="Todo does not exist")
+
+    @staticmethod
+    def _resolve(entity_id: int | str | None, id_map: dict[str, int]):
+        """Swap a temporary id for the server id it was created with"""
+        if not isinstance(entity_id, str):
+            return entity_id
+        if entity_id not in id_map:
+            raise HTTPException(
+                status_code=404, detail=f"Unknown temporary id: {entity_id}"
+            )
+        return id_map[entity_id]
+
+    @staticmethod
+    def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+        """Client times are compared to updated_at as naive UTC, the database clock"""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def _describe(error: ValidationError) -> str:
+        return "; ".join(
+            f"{'.'.join(map(str, item['loc']))}: {item['msg']}"
+            for item in error.errors()
+        )
@@ -1,11 +1,24 @@
+from datetime import datetime
+from typing import Optional
+
 from fastapi import Depends, HTTPException
 
+from app.todo.cache import TASK_LIST, response_cache
 from app.todo.models import Task
 from app.todo.repositories.task import TaskRepository, TaskRepositoryABC
 from app.todo.repositories.todo import TodoRepository, TodoRepositoryABC
-from app.todo.schemas.request import TaskRequestSchema, TaskRequestPartialUpdateSchema
+from app.todo.schemas.request import (
+    TaskBulkRequestSchema,
+    TaskBulkUpdateRequestSchema,
+    TaskFilterSchema,
+    TaskRequestSchema,
+    TaskRequestPartialUpdateSchema,
+)
+from app.todo.schemas.response import TaskResponseSchema
 from app.user.models.user import User
+from core.cache.bus import invalidation_bus
 from core.db import unit_of_work
+from core.db.pagination import InvalidCursor, decode_cursor
 
 
 class TaskService(object):
@@ -19,29 +32,113 @@ class TaskService(object):
 
     @unit_of_work
     async def create_task(self, request: TaskRequestSchema, user: User) -> Task:
-        task = Task(**request.dict())
-        task.owner = user
-        result = await self.task_repository.create_task(task)
+        values = request.dict()
+        values["owner_id"] = user.id
+        result = await self.task_repository.create_task(values)
+        await invalidation_bus.publish("task", result.id, [user.id])
         return result
 
+    @unit_of_work
+    async def create_tasks(
+        self, request: TaskBulkRequestSchema, user: User
+    ) -> list[Task]:
+        """Create many tasks, possibly across several of the user's todos, at once"""
+        await self._check_todos_owned({task.todo_id for task in request.tasks}, user)
+        values = [{**task.dict(), "owner_id": user.id} for task in request.tasks]
+        tasks = await self.task_repository.create_tasks(values)
+        await invalidation_bus.publish("task", None, [user.id])
+        return tasks
+
+    @unit_of_work
+    async def bulk_update(self, request: TaskBulkUpdateRequestSchema, user: User):
+        """
+        Update many tasks at once, either with per task changes or by applying
+        the same values to every task matching a filter.
+        """
+        if request.filter is not None:
+            values = request.values.dict(exclude_unset=True)
+            if "todo_id" in values:
+                await self._check_todos_owned({values["todo_id"]}, user)
+            updated = await self.task_repository.update_where(
+                user.id, values, **request.filter.dict(exclude_unset=True)
+            )
+            await invalidation_bus.publish("task", None, [user.id])
+            return {"updated": updated}
+
+        changes = [task.dict(exclude_unset=True) for task in request.tasks]
+        todo_ids = {item["todo_id"] for item in changes if "todo_id" in item}
+        if todo_ids:
+            await self._check_todos_owned(todo_ids, user)
+        tasks = await self.task_repository.bulk_partial_update(user.id, changes)
+        await invalidation_bus.publish("task", None, [user.id])
+        found = {task.id for task in tasks}
+        return {
+            "updated": len(tasks),
+            "tasks": tasks,
+            "not_found": sorted({item["id"] for item in changes} - found),
+        }
+
+    async def _check_todos_owned(self, todo_ids: set[int], user: User) -> None:
+        owned = await self.todo_repository.get_owned_todo_ids(todo_ids, user.id)
+        if owned != todo_ids:
+            missing = sorted(todo_ids - owned)
+            raise HTTPException(
+                status_code=404, detail=f"Todo does not exist: {missing}"
+            )
+
     async def get_task_by_id(self, todo_id: int, user: User):
         return await self.task_repository.get_task_by_id(todo_id, user.id)
 
     async def get_tasks(
-        self, user: User, skip: int, limit: int, todo_id: int
-    ) -> list[Task]:
-        return await self.task_repository.get_tasks(user.id, skip, limit, todo_id)
+        self,
+        user: User,
+        skip: int,
+        limit: int,
+        todo_id: int,
+        cursor: Optional[str] = None,
+        filters: Optional[TaskFilterSchema] = None,
+    ) -> list[TaskResponseSchema]:
+        after = self._decode_cursor(cursor) if cursor is not None else None
+        filters = filters.dict(exclude_none=True) if filters else None
+        return await response_cache.get_or_load(
+            user.id,
+            "tasks",
+            (skip, limit, todo_id, after, filters),
+            TASK_LIST,
+            lambda: self.task_repository.get_tasks(
+                user.id, skip, limit, todo_id, after=after, filters=filters
+            ),
+        )
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple[int | None, datetime, int]:
+        try:
+            priority, created_at, task_id = decode_cursor(cursor, 3)
+            return (
+                None if priority is None else int(priority),
+                datetime.fromisoformat(created_at),
+                int(task_id),
+            )
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+
+    async def get_tasks_version(self, user: User) -> str:
+        """Changes along with any of the user's tasks, a validator of a task or a listing"""
+        return await response_cache.version(user.id)
 
     async def delete_task_by_id(self, todo_id: int, user: User) -> None:
-        return await self.task_repository.delete_task_by_id(todo_id, user.id)
+        result = await self.task_repository.delete_task_by_id(todo_id, user.id)
+        await invalidation_bus.publish("task", todo_id, [user.id])
+        return result
 
     async def partial_update(
         self, task_id: int, task: TaskRequestPartialUpdateSchema, user
     ):
-        task_item: Task = await self.task_repository.get_task_by_id(task_id, user.id)
+        update_data = task.dict(exclude_unset=True)
+        task_item: Task = await self.task_repository.partial_update(
+            task_id, user.id, update_data
+        )
         if task_item is None:
             raise HTTPException(status_code=404, detail="Task not found")
-        update_data = task.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(task_item, key, value)
-        return await self.task_repository.partial_update(task_id, task_item)
+        await invalidation_bus.publish("task", task_id, [user.id])
+        return task_item
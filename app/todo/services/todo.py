@@ -1,21 +1,37 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException
 
+from app.todo.cache import TODO_LIST, response_cache
 from app.todo.models import Todo
+from app.todo.repositories.shared_todo import (
+    SharedTodoRepository,
+    SharedTodoRepositoryABC,
+)
 from app.todo.repositories.todo import TodoRepository, TodoRepositoryABC
 from app.todo.schemas.request import TodoRequestSchema, TodoRequestPartialSchema
+from app.todo.schemas.response import TodoResponseSchema
 from app.user.models.user import User
+from core.cache.bus import invalidation_bus
 from core.db import unit_of_work
+from core.db.pagination import decode_id_cursor
 
 
 class TodoService(object):
-    def __init__(self, todo_repository: TodoRepositoryABC = Depends(TodoRepository)):
+    def __init__(
+        self,
+        todo_repository: TodoRepositoryABC = Depends(TodoRepository),
+        shared_todo_repository: SharedTodoRepositoryABC = Depends(SharedTodoRepository),
+    ):
         self.todo_repository = todo_repository
+        self.shared_todo_repository = shared_todo_repository
 
     @unit_of_work
     async def create_todo(self, request: TodoRequestSchema, user: User) -> Todo:
-        todo = Todo(**request.dict())
-        todo.owner = user
-        result = await self.todo_repository.create_todo(todo)
+        values = request.dict()
+        values["owner_id"] = user.id
+        result = await self.todo_repository.create_todo(values)
+        await invalidation_bus.publish("todo", result.id, [user.id])
         return result
 
     async def get_todo_by_id(self, todo_id: int, user: User):
@@ -23,19 +39,43 @@ class TodoService(object):
         if not result:
             raise HTTPException(404, detail="Todo does not exist")
 
-    async def get_todos(self, user: User, skip: int, limit: int) -> list[Todo]:
-        return await self.todo_repository.get_todos(user.id, skip, limit)
+    async def get_todos(
+        self, user: User, skip: int, limit: int, cursor: Optional[str] = None
+    ) -> list[TodoResponseSchema]:
+        after = decode_id_cursor(cursor) if cursor is not None else None
+        return await response_cache.get_or_load(
+            user.id,
+            "todos",
+            (skip, limit, after),
+            TODO_LIST,
+            lambda: self.todo_repository.get_todos(user.id, skip, limit, after=after),
+            coalesce=True,
+        )
+
+    async def get_todos_version(self, user: User) -> str:
+        return await response_cache.version(user.id)
 
     async def delete_todo_by_id(self, todo_id: int, user: User) -> None:
-        return await self.todo_repository.delete_todo_by_id(todo_id, user.id)
+        # Memberships of someone else's todo are none of the user's business.
+        # They have no ON DELETE CASCADE, a todo still shared fails to delete
+        # with 422 and nothing is published.
+        shared_with = []
+        if await self.todo_repository.get_owned_todo_ids({todo_id}, user.id):
+            shared_with = await self.shared_todo_repository.get_shared_user_ids(todo_id)
+        result = await self.todo_repository.delete_todo_by_id(todo_id, user.id)
+        await invalidation_bus.publish("todo", todo_id, [user.id, *shared_with])
+        return result
 
     async def partial_update(
         self, todo_id: int, todo: TodoRequestPartialSchema, user: User
     ):
-        todo_item: Todo = await self.todo_repository.get_todo_by_id(todo_id, user.id)
+        update_data = todo.dict(exclude_unset=True)
+        todo_item: Todo = await self.todo_repository.partial_update(
+            todo_id, user.id, update_data
+        )
         if todo_item is None:
             raise HTTPException(status_code=404, detail="Todo not found")
-        update_data = todo.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(todo_item, key, value)
-        return await self.todo_repository.partial_update(todo_id, todo_item)
+        # The todo is embedded in the shared todos listing of its recipients
+        shared_with = await self.shared_todo_repository.get_shared_user_ids(todo_id)
+        await invalidation_bus.publish("todo", todo_id, [user.id, *shared_with])
+        return todo_item
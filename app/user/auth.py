@@ -6,6 +6,7 @@ from fastapi_users.authentication import BearerTransport, AuthenticationBackend
 from fastapi_users.authentication import JWTStrategy
 
 from app.user.models.user import get_user_db, UserManager, User
+from core.db.session import set_routing_user
 from core.settings.config import settings
 
 SECRET = settings.secret_key
@@ -27,4 +28,10 @@ auth_backend = AuthenticationBackend(
     get_strategy=get_jwt_strategy,
 )
 fastapi_users = FastAPIUsers[User, uuid.UUID](get_user_manager, [auth_backend])
-current_user = fastapi_users.current_user()
+authenticated_user = fastapi_users.current_user()
+
+
+async def current_user(user: User = Depends(authenticated_user)) -> User:
+    # Reads of a user who just wrote go to the primary, from any client
+    set_routing_user(user.id)
+    return user
@@ -0,0 +1,28 @@
+import uuid
+from typing import Optional
+
+from core.cache import TTLCache
+from core.cache.bus import InvalidationEvent, invalidation_bus
+from core.metrics import Counter
+from core.settings.config import settings
+
+# Column values of the authenticated users keyed by user id, see UserDB.get
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+Counter(
+    "user_cache_hits", "Users served from user_cache", callback=lambda: user_cache.hits
+)
+Counter(
+    "user_cache_misses",
+    "Users loaded into user_cache",
+    callback=lambda: user_cache.misses,
+)
+
+
+async def evict_user(event: Optional[InvalidationEvent]) -> None:
+    if event is None:
+        user_cache.clear()
+    elif event.entity == "user":
+        user_cache.delete(uuid.UUID(str(event.entity_id)))
+
+
+invalidation_bus.subscribe(evict_user)
@@ -1,30 +1,46 @@
 import uuid
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 
 from fastapi import Depends
 from fastapi import Request
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import BaseUserManager, UUIDIDMixin, InvalidPasswordException
 from fastapi_users import exceptions, models, schemas
-from fastapi_users.models import UP
+from fastapi_users.models import ID, UP
 from fastapi_users_db_sqlalchemy import (
     SQLAlchemyUserDatabase,
     SQLAlchemyBaseUserTableUUID,
 )
 from sqlalchemy import Column
-from sqlalchemy import String, select
+from sqlalchemy import String, func, inspect, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import make_transient_to_detached, relationship
 
 import app.todo.models as reload_related_models  # noqa
+from app.user.cache import user_cache
+from core.cache.bus import invalidation_bus
 from app.user.schema.request import UserCreateRequestScheme
 from core.db import BaseModel, unit_of_work
 from core.db.session import get_async_session
+from core.executor import BoundedExecutor
+from core.metrics import Gauge
 from core.settings.config import settings
 
 SECRET = settings.secret_key
 
+# Hashing is deliberately slow and CPU bound, keep it off the event loop
+password_executor = BoundedExecutor(
+    "password-hash",
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+)
+Gauge(
+    "password_hash_pending",
+    "Logins and registrations hashing or queued to hash a password",
+    callback=lambda: password_executor.pending,
+)
+
 
 class User(SQLAlchemyBaseUserTableUUID, BaseModel):
     username = Column(String, unique=True)
@@ -39,6 +55,48 @@ class UserDB(SQLAlchemyUserDatabase):
         statement = select(self.user_table).where(self.user_table.username == username)
         return await self._get_user(statement)
 
+    async def get_ids_by_emails(self, emails: list[str]) -> dict[str, ID]:
+        # Case insensitive like `get_by_email`, keyed by the caller's spelling
+        lowered = func.lower(self.user_table.email)
+        statement = select(lowered, self.user_table.id).where(
+            lowered.in_(list({email.lower() for email in emails}))
+        )
+        ids = dict((await self.session.execute(statement)).all())
+        return {email: ids[email.lower()] for email in emails if email.lower() in ids}
+
+    async def get(self, id: ID) -> Optional[UP]:
+        """
+        Get a user by id, served from `user_cache` when possible.
+
+        Every authenticated request resolves its user here, a cache hit is
+        merged into the session without emitting a SELECT.
+        """
+        values = user_cache.get(id)
+        if values is not None:
+            user = self.user_table(**values)
+            make_transient_to_detached(user)
+            return await self.session.merge(user, load=False)
+
+        user = await super().get(id)
+        if user is not None:
+            user_cache.set(
+                id,
+                {
+                    column.key: getattr(user, column.key)
+                    for column in inspect(self.user_table).column_attrs
+                },
+            )
+        return user
+
+    async def update(self, user: UP, update_dict: Dict[str, Any]) -> UP:
+        user = await super().update(user, update_dict)
+        await invalidation_bus.publish("user", user.id, [user.id])
+        return user
+
+    async def delete(self, user: UP) -> None:
+        await super().delete(user)
+        await invalidation_bus.publish("user", user.id, [user.id])
+
 
 async def get_user_db(async_session: AsyncSession = Depends(get_async_session)):
     yield UserDB(async_session, User)
@@ -66,6 +124,15 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
 
         return user
 
+    async def get_ids_by_emails(self, emails: list[str]) -> dict[str, uuid.UUID]:
+        """
+        Resolve many e-mails to user ids in one query.
+
+        :param emails: e-mails of the users to retrieve.
+        :return: A mapping of the known e-mails, as given, to their user id.
+        """
+        return await self.user_db.get_ids_by_emails(emails)
+
     @unit_of_work
     async def create(
         self,
@@ -98,7 +165,9 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
             else user_create.create_update_dict_superuser()
         )
         password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+        user_dict["hashed_password"] = await password_executor.run(
+            self.password_helper.hash, password
+        )
 
         try:
             created_user = await self.user_db.create(user_dict)
@@ -123,11 +192,13 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         except exceptions.UserNotExists:
             # Run the hasher to mitigate timing attack
             # Inspired from Django: https://code.djangoproject.com/ticket/20760
-            self.password_helper.hash(credentials.password)
+            await password_executor.run(self.password_helper.hash, credentials.password)
             return None
 
-        verified, updated_password_hash = self.password_helper.verify_and_update(
-            credentials.password, user.hashed_password
+        verified, updated_password_hash = await password_executor.run(
+            self.password_helper.verify_and_update,
+            credentials.password,
+            user.hashed_password,
         )
         if not verified:
             return None
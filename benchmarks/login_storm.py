@@ -0,0 +1,91 @@
+"""
+`/health` latency during a login storm.
+
+Runs the application in-process, floods `/user/login` while probing
+`/health`, once hashing on the event loop (the previous behaviour) and
+once through the bounded password executor. Point it at a scratch
+database, the schema is created when missing.
+
+    DATABASE_URL=sqlite+aiosqlite:////tmp/bench.db python -m benchmarks.login_storm
+"""
+
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from app.user.models import user as user_models
+from core.db import BaseModel
+from core.db.session import EngineType, get_engine
+from main import app
+
+DURATION = 3
+LOGIN_CONCURRENCY = 32
+PROBE_INTERVAL = 0.02
+
+USER = {"username": "storm", "email": "storm@example.com", "password": "storm-password"}
+
+
+async def inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+async def login_storm(client, deadline, statuses):
+    credentials = {"username": USER["username"], "password": USER["password"]}
+    while time.perf_counter() < deadline:
+        response = await client.post("/user/login", data=credentials)
+        statuses.append(response.status_code)
+
+
+async def probe(client, deadline, latencies):
+    # Open loop: a probe is fired every PROBE_INTERVAL whatever happened to
+    # the previous ones, and latency is taken from its scheduled time, so a
+    # stalled event loop shows up instead of silently delaying the sampling
+    async def one(scheduled):
+        await client.get("/health")
+        latencies.append(time.perf_counter() - scheduled)
+
+    probes = []
+    scheduled = time.perf_counter()
+    while scheduled < deadline:
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        probes.append(asyncio.create_task(one(scheduled)))
+        scheduled += PROBE_INTERVAL
+    await asyncio.gather(*probes)
+
+
+async def measure(name, client):
+    latencies, statuses = [], []
+    deadline = time.perf_counter() + DURATION
+    await asyncio.gather(
+        probe(client, deadline, latencies),
+        *(login_storm(client, deadline, statuses) for _ in range(LOGIN_CONCURRENCY)),
+    )
+    p50 = statistics.median(latencies) * 1000
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+    print(
+        f"{name:<10} /health p50 {p50:7.2f}ms p99 {p99:7.2f}ms "
+        f"logins {statuses.count(200):5d} rejected(503) {statuses.count(503):5d}"
+    )
+
+
+async def main():
+    async with get_engine(EngineType.READER_WRITER).begin() as connection:
+        await connection.run_sync(BaseModel.metadata.create_all)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        await client.post("/user/register", json=USER)
+
+        run = user_models.password_executor.run
+        user_models.password_executor.run = inline
+        await measure("inline", client)
+        user_models.password_executor.run = run
+        await measure("executor", client)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+Per-request session overhead.
+
+Replays the session lifecycle of a write request (middleware scope,
+repository dependency, `unit_of_work` cleanup) with a session factory
+built per dependency call, as before, and with the shared request scoped
+session, then reports the time spent and sessions created per request.
+
+    DATABASE_URL=sqlite+aiosqlite:// python -m benchmarks.session
+"""
+
+import asyncio
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from core.db.session import (
+    RoutingSession,
+    get_async_session,
+    reset_session_context,
+    session,
+    set_session_context,
+)
+
+REQUESTS = 20_000
+
+created_sessions = 0
+
+
+async def per_request_factory_dependency():
+    _session = async_sessionmaker(
+        class_=AsyncSession,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+    )()
+    try:
+        yield _session
+    finally:
+        await _session.close()
+
+
+async def request(dependency):
+    global created_sessions
+    context = set_session_context(session_id=str(uuid.uuid4()))
+    sessions = set()
+    try:
+        repository = dependency()
+        sessions.add(await anext(repository))
+        # unit_of_work cleanup
+        sessions.add(session())
+        await session.close()
+        await repository.aclose()
+    finally:
+        await session.remove()
+        reset_session_context(context)
+    created_sessions += len(sessions)
+
+
+async def measure(name, dependency):
+    global created_sessions
+    created_sessions = 0
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await request(dependency)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{name:<24} {elapsed / REQUESTS * 1e6:8.2f} us/request "
+        f"{created_sessions / REQUESTS:.0f} session(s)/request"
+    )
+
+
+async def main():
+    await measure("per request factory", per_request_factory_dependency)
+    await measure("scoped session", get_async_session)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
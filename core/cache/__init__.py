@@ -0,0 +1,12 @@
+from .backend import CacheBackend, MemoryBackend
+from .singleflight import SingleFlight
+from .ttl import TTLCache
+from .versioned import VersionedCache
+
+__all__ = [
+    "CacheBackend",
+    "MemoryBackend",
+    "SingleFlight",
+    "TTLCache",
+    "VersionedCache",
+]
@@ -0,0 +1,113 @@
+import abc
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class CacheBackend(abc.ABC):
+    """
+    Byte store behind `VersionedCache`.
+
+    Implementations sharing their store between workers, e.g. over Redis,
+    let a version bump in one worker invalidate the others.
+    """
+
+    # Changes whenever versions start over or may have missed a bump, the
+    # versions of different epochs are unrelated
+    epoch = ""
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def get_version(self, namespace: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    async def bump_version(self, namespace: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    def stats(self) -> dict[str, int]:
+        ...
+
+    def clear(self) -> None:
+        """Forget the entries this process holds, a shared store has nothing to do"""
+
+
+class MemoryBackend(CacheBackend):
+    """
+    An in-process LRU store capped by the bytes it holds, entries expire after `ttl` seconds.
+
+    Versions are plain counters that are never evicted, an evicted version
+    would start over and could reach entries cached under it before.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        # Versions are local to this process and missed bumps end in clear()
+        self._epoch = uuid.uuid4().hex
+
+    @property
+    def epoch(self) -> str:
+        # Also moves on every `ttl` seconds, a bump this process never heard
+        # of, e.g. a lost NOTIFY, is then stale no longer than the entries
+        if self.ttl <= 0:
+            return uuid.uuid4().hex
+        return f"{self._epoch}.{int(time.monotonic() // self.ttl)}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: bytes) -> None:
+        cost = len(key) + len(value)
+        if self.ttl <= 0 or cost > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self.size += cost
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def get_version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    async def bump_version(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        return self._versions[namespace]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
+        self._epoch = uuid.uuid4().hex
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self.size -= len(key) + len(value)
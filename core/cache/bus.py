@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import asyncpg
+from sqlalchemy import make_url
+
+from core.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7900
+
+
+@dataclass(frozen=True)
+class InvalidationEvent(object):
+    entity: str
+    entity_id: Any
+    user_ids: tuple[str, ...] = ()
+
+
+# Called with None when events may have been missed, everything is suspect
+Subscriber = Callable[[Optional[InvalidationEvent]], Awaitable[None]]
+
+
+class InvalidationBus(object):
+    """
+    Evicts the in-process caches of every worker after a write.
+
+    Services publish an event once their write committed, subscribers of
+    this worker run right away and the others are told over a Postgres
+    NOTIFY. Each worker holds one dedicated LISTEN connection, opened from
+    the application lifespan and reopened when it drops. Without Postgres,
+    e.g. on SQLite, events only reach the subscribers of this worker.
+    """
+
+    def __init__(self, database_url: str, channel: str, retry_seconds: float) -> None:
+        url = make_url(database_url) if database_url else None
+        self.dsn = None
+        if url is not None and url.get_backend_name() == "postgresql":
+            self.dsn = url.set(drivername="postgresql").render_as_string(
+                hide_password=False
+            )
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self.origin = uuid.uuid4().hex
+        self._subscribers: list[Subscriber] = []
+        self._connection = None
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: set[asyncio.Task] = set()
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.append(subscriber)
+
+    async def publish(
+        self, entity: str, entity_id: Any, user_ids: Iterable[Any] = ()
+    ) -> None:
+        """Evict what `(entity, entity_id, user_ids)` made stale, here and on every worker"""
+        event = InvalidationEvent(
+            entity, entity_id, tuple(dict.fromkeys(str(i) for i in user_ids))
+        )
+        await self._dispatch(event)
+        if self._connection is None:
+            return
+        try:
+            async with self._lock:
+                for payload in self._payloads(event):
+                    await self._connection.execute(
+                        "SELECT pg_notify($1, $2)", self.channel, payload
+                    )
+        except Exception:
+            # The write is committed, other workers catch up once their entries
+            # expire and their cache epoch moves on, see MemoryBackend.epoch
+            logger.warning("Could not publish %s", event, exc_info=True)
+
+    def _payloads(self, event: InvalidationEvent) -> Iterable[str]:
+        def payload(user_ids) -> str:
+            return json.dumps(
+                {
+                    "origin": self.origin,
+                    "entity": event.entity,
+                    "entity_id": event.entity_id,
+                    "user_ids": user_ids,
+                },
+                default=str,
+            )
+
+        chunk = []
+        for user_id in event.user_ids:
+            if chunk and len(payload([*chunk, user_id]).encode()) > MAX_PAYLOAD_BYTES:
+                yield payload(chunk)
+                chunk = []
+            chunk.append(user_id)
+        yield payload(chunk)
+
+    async def start(self) -> None:
+        if self.dsn is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except (OSError, asyncpg.PostgresError):
+                logger.warning(
+                    "Could not listen on %s, retrying", self.channel, exc_info=True
+                )
+                await asyncio.sleep(self.retry_seconds)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(self.channel, self._on_notification)
+                self._connection = connection
+                # Whatever was published while disconnected is lost
+                await self._dispatch(None)
+                await closed.wait()
+                logger.warning("Lost the %s listener, reconnecting", self.channel)
+            finally:
+                self._connection = None
+                if not connection.is_closed():
+                    await connection.close()
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        message = json.loads(payload)
+        if message["origin"] == self.origin:
+            return
+        event = InvalidationEvent(
+            message["entity"], message["entity_id"], tuple(message["user_ids"])
+        )
+        task = asyncio.create_task(self._dispatch(event))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _dispatch(self, event: Optional[InvalidationEvent]) -> None:
+        for subscriber in self._subscribers:
+            try:
+                await subscriber(event)
+            except Exception:
+                logger.exception("Invalidation subscriber failed on %s", event)
+
+
+invalidation_bus = InvalidationBus(
+    settings.database_url,
+    settings.cache_invalidation_channel,
+    settings.cache_invalidation_retry_seconds,
+)
@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight(object):
+    """
+    Concurrent calls for the same key share one in-flight call.
+
+    The first caller runs `load`, callers arriving before it finished await
+    its result, or its exception, instead of running their own. Should the
+    first caller be cancelled, e.g. its client went away, the others start
+    over. Meant to be used from the event loop thread, it takes no locks.
+    """
+
+    def __init__(self) -> None:
+        self.shared = 0
+        self._flights: dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.shared += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+            return await self.do(key, load)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            result = await load()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Retrieved, no waiter is needed to silence the loop's warning
+            flight.exception()
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
@@ -0,0 +1,98 @@
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Hashable
+
+from pydantic import TypeAdapter
+
+from core.cache.backend import CacheBackend
+from core.cache.singleflight import SingleFlight
+
+
+class VersionedCache(object):
+    """
+    Results cached per namespace, e.g. a user, and invalidated by bumping the namespace version.
+
+    Keys embed the version read before loading, so a result loaded while a
+    write commits lands under the old version and is never served again.
+    Bump after the write committed, a result loaded in between would
+    otherwise be cached under the new version.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.flights = SingleFlight()
+
+    async def get_or_load(
+        self,
+        namespace: Hashable,
+        name: str,
+        params: tuple,
+        adapter: TypeAdapter,
+        load: Callable[[], Awaitable[Any]],
+        coalesce: bool = False,
+    ) -> Any:
+        """
+        The cached result of `load`, or load, validate and cache it.
+
+        :param namespace: the owner of the result, bumping it invalidates the result.
+        :param name: the kind of result, e.g. the endpoint.
+        :param params: everything else shaping the result.
+        :param adapter: validates the loaded value and (de)serializes it.
+        :param coalesce: share one load between concurrent misses of the same
+            key, the version being part of the key a read started after a
+            write never joins a load started before it.
+        :return: the value validated by `adapter`.
+        """
+        namespace = str(namespace)
+        version = await self.backend.get_version(namespace)
+        digest = hashlib.sha1(
+            json.dumps(
+                params, default=str, separators=(",", ":"), sort_keys=True
+            ).encode()
+        ).hexdigest()
+        key = f"{namespace}:{version}:{name}:{digest}"
+
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return adapter.validate_json(cached)
+        self.misses += 1
+
+        async def load_and_set() -> Any:
+            value = adapter.validate_python(await load(), from_attributes=True)
+            await self.backend.set(key, adapter.dump_json(value))
+            return value
+
+        if coalesce:
+            return await self.flights.do(key, load_and_set)
+        return await load_and_set()
+
+    async def version(self, namespace: Hashable) -> str:
+        """
+        The version of `namespace`, a validator of everything loaded for it.
+
+        Results cached under it are current as long as it does not change,
+        an ETag built on it answers 304 without querying the database. The
+        backend epoch bounds how long it stays current when a bump was missed.
+        """
+        version = await self.backend.get_version(str(namespace))
+        return f"{self.backend.epoch}:{version}"
+
+    async def invalidate(self, *namespaces: Hashable) -> None:
+        for namespace in set(namespaces):
+            await self.backend.bump_version(str(namespace))
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "coalesced": self.flights.shared,
+            **self.backend.stats(),
+        }
@@ -0,0 +1,47 @@
+import hashlib
+import json
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class NotModified(Exception):
+    """Raised when the client already holds the current representation, answered with a 304."""
+
+    def __init__(self, headers: dict[str, str]) -> None:
+        super().__init__("Not Modified")
+        self.headers = headers
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    A weak ETag over the parts identifying a representation.
+
+    :param parts: the data validator, e.g. the version of the user's cached
+        results, followed by the parameters shaping the response.
+    """
+    payload = json.dumps(parts, default=str, separators=(",", ":"))
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of `etag` against the request's If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    # "*" is left out, only a GET of an existing resource could answer it
+    # with 304 and the ETag is checked before the resource is looked up
+    return etag.removeprefix("W/") in tags
+
+
+def check_etag(request: Request, response: Response, etag: str) -> None:
+    """
+    Set the ETag of the response, or raise `NotModified` when the client's
+    copy is current so the rows are never loaded.
+    """
+    headers = {"ETag": etag}
+    if etag_matches(request, etag):
+        raise NotModified(headers)
+    response.headers.update(headers)
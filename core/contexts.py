@@ -1,6 +1,27 @@
 import uuid
 from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from core.db.stats import QueryStats
+
+
+@dataclass
+class RoutingState:
+    use_primary: bool = False
+    wrote: bool = False
+    user_id: Optional[str] = None
+
 
 database_session_context: ContextVar[str] = ContextVar(
     "database_session_context", default=uuid.uuid4().__str__()
 )
+
+database_routing_context: ContextVar[Optional[RoutingState]] = ContextVar(
+    "database_routing_context", default=None
+)
+
+database_query_stats: ContextVar[Optional["QueryStats"]] = ContextVar(
+    "database_query_stats", default=None
+)
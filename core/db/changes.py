@@ -0,0 +1,95 @@
+from sqlalchemy import DDL, BigInteger, MetaData, Table, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+# Serves the change sequence on SQLite, whose writers already run one at a time
+SQLITE_SEQUENCE = "change_sequence"
+
+
+class change_watermark(FunctionElement):
+    """
+    The `change_seq` below which every row is committed, or rolled back, for good.
+
+    On PostgreSQL a row is stamped with the id of the transaction writing
+    it, and the watermark is the oldest transaction still running, so a
+    transaction that started early and commits late is never skipped by a
+    reader that already moved past it. SQLite stamps rows from a counter
+    bumped under its write lock, in commit order.
+    """
+
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(change_watermark)
+def _change_watermark(element, compiler, **kw):
+    return "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+@compiles(change_watermark, "sqlite")
+def _change_watermark_sqlite(element, compiler, **kw):
+    return f"(SELECT value + 1 FROM {SQLITE_SEQUENCE})"
+
+
+def change_sequence(metadata: MetaData) -> None:
+    """Create what stamps the `change_seq` of rows along with the tables of `metadata`"""
+    statements = {
+        "postgresql": [
+            "CREATE OR REPLACE FUNCTION stamp_change_seq() RETURNS trigger AS $$ "
+            "BEGIN NEW.change_seq := pg_current_xact_id()::text::bigint; "
+            "RETURN NEW; END $$ LANGUAGE plpgsql",
+        ],
+        "sqlite": [
+            f"CREATE TABLE IF NOT EXISTS {SQLITE_SEQUENCE} (value INTEGER NOT NULL)",
+            f"INSERT INTO {SQLITE_SEQUENCE} (value) SELECT 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {SQLITE_SEQUENCE})",
+        ],
+    }
+    for dialect, creates in statements.items():
+        for statement in creates:
+            event.listen(
+                metadata, "before_create", DDL(statement).execute_if(dialect=dialect)
+            )
+    event.listen(
+        metadata,
+        "after_drop",
+        DDL("DROP FUNCTION IF EXISTS stamp_change_seq()").execute_if(
+            dialect="postgresql"
+        ),
+    )
+    event.listen(
+        metadata,
+        "after_drop",
+        DDL(f"DROP TABLE IF EXISTS {SQLITE_SEQUENCE}").execute_if(dialect="sqlite"),
+    )
+
+
+def change_tracked(source: Table) -> None:
+    """
+    Stamp `change_seq` on every row inserted into or updated in `source`.
+
+    Triggers do the stamping, whatever statement writes the row.
+    """
+    name = source.name
+    event.listen(
+        source,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {name}_change_seq BEFORE INSERT OR UPDATE ON {name} "
+            "FOR EACH ROW EXECUTE FUNCTION stamp_change_seq()"
+        ).execute_if(dialect="postgresql"),
+    )
+    stamp = (
+        f"UPDATE {SQLITE_SEQUENCE} SET value = value + 1; "
+        f"UPDATE {name} SET change_seq = (SELECT value FROM {SQLITE_SEQUENCE}) "
+        "WHERE rowid = new.rowid;"
+    )
+    for operation in ("INSERT", "UPDATE"):
+        event.listen(
+            source,
+            "after_create",
+            DDL(
+                f"CREATE TRIGGER {name}_change_seq_{operation.lower()} "
+                f"AFTER {operation} ON {name} BEGIN {stamp} END"
+            ).execute_if(dialect="sqlite"),
+        )
@@ -0,0 +1,16 @@
+from sqlalchemy import Table, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.expression import Insert
+
+# The dialects whose INSERT takes ON CONFLICT, the ones this project runs on
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def conflict_insert(session: AsyncSession, table: Table) -> Insert:
+    """
+    An INSERT into `table` supporting `on_conflict_do_nothing`, for the
+    dialect of the engine `session` writes `table` with.
+    """
+    bind = session.get_bind(clause=insert(table))
+    return _INSERTS[bind.dialect.name](table)
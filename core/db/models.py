@@ -1,18 +1,56 @@
 from datetime import datetime
 
 from sqlalchemy import DateTime, func
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql.functions import FunctionElement
+
+from core.db.changes import change_sequence
+
+
+class naive_now(FunctionElement):
+    """
+    The database clock as stored by `func.now()` defaults in naive DateTime columns.
+
+    PostgreSQL's now() is time zone aware, LOCALTIMESTAMP is the value the
+    column ends up holding.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(naive_now)
+def _naive_now(element, compiler, **kw):
+    return "LOCALTIMESTAMP"
+
+
+@compiles(naive_now, "sqlite")
+def _naive_now_sqlite(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+# SQLite stores the func.now() defaults as CURRENT_TIMESTAMP text, without a
+# fraction of a second; bind datetimes the same way so they compare as equals
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(
+        storage_format="%(year)04d-%(month)02d-%(day)02d "
+        "%(hour)02d:%(minute)02d:%(second)02d"
+    ),
+    "sqlite",
+)
 
 
 class CreatedUpdatedMixin(object):
     created_at: Mapped[datetime] = mapped_column(
-        DateTime,
+        Timestamp,
         default=func.now(),
         nullable=False,
     )
     updated_at: Mapped[datetime] = mapped_column(
-        DateTime,
+        Timestamp,
         default=func.now(),
         onupdate=func.now(),
         nullable=False,
@@ -21,3 +59,6 @@ class CreatedUpdatedMixin(object):
 
 class BaseModel(CreatedUpdatedMixin, DeclarativeBase):
     ...
+
+
+change_sequence(BaseModel.metadata)
@@ -0,0 +1,74 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    ...
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+
+    :param values: the keyset values of the last row, in ORDER BY order.
+    :return: a url-safe cursor string.
+    """
+    payload = json.dumps(values, default=_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    :param cursor: the opaque cursor sent by the client.
+    :param size: the expected number of keyset values.
+    :raises InvalidCursor: The cursor is malformed.
+    :return: the keyset values, datetimes are returned as ISO strings.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+
+def decode_id_cursor(cursor: str) -> int:
+    """
+    Decode the cursor of a listing ordered by id alone.
+
+    :raises InvalidCursor: The cursor is malformed.
+    """
+    try:
+        (last_id,) = decode_cursor(cursor, 1)
+        return int(last_id)
+    except (TypeError, ValueError):
+        raise InvalidCursor(cursor)
+
+
+def next_cursor(rows: Sequence[Any], limit: int, *columns: str) -> str | None:
+    """
+    Build the cursor of the page following `rows`, or None for the last page.
+
+    :param rows: the current page.
+    :param limit: the page size that was requested.
+    :param columns: the keyset attribute names, in ORDER BY order.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(*(getattr(last, column) for column in columns))
@@ -0,0 +1,61 @@
+import itertools
+import time
+from typing import Optional
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    A queue pool keeping track of the checkouts waiting on it.
+
+    A checkout waits while every connection is out, or while a new one is
+    being opened. How long the oldest one waits tells an exhausted pool
+    apart from a busy one, without an average to decay once it recovers.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._tokens = itertools.count()
+        self._waiting: dict[int, float] = {}
+
+    def connect(self) -> PoolProxiedConnection:
+        token = next(self._tokens)
+        self._waiting[token] = time.monotonic()
+        try:
+            return super().connect()
+        finally:
+            del self._waiting[token]
+
+    @property
+    def capacity(self) -> Optional[int]:
+        """Connections the pool opens at most, None when `max_overflow` is -1, unlimited"""
+        if self._max_overflow < 0:
+            return None
+        return self.size() + self._max_overflow
+
+    def waiting(self) -> int:
+        return len(self._waiting)
+
+    def oldest_wait(self) -> float:
+        """Seconds the longest waiting checkout has been waiting, 0 without any"""
+        if not self._waiting:
+            return 0.0
+        return time.monotonic() - min(self._waiting.values())
+
+    def exhausted(self) -> bool:
+        """Every connection is checked out, an unlimited pool never is"""
+        return self.capacity is not None and self.checkedout() >= self.capacity
+
+    def status(self) -> dict:
+        return {
+            "size": self.size(),
+            "capacity": self.capacity,
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "waiting": self.waiting(),
+            "wait_seconds": round(self.oldest_wait(), 3),
+            "saturation": (
+                round(self.checkedout() / self.capacity, 3) if self.capacity else None
+            ),
+        }
@@ -0,0 +1,84 @@
+import re
+
+from sqlalchemy import DDL, Column, Table, Text, column, event, table
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql.expression import TableClause
+
+SEARCH_CONFIG = "english"
+
+
+def search_vector():
+    """
+    A PostgreSQL tsvector, deferred so it is never loaded.
+
+    `postgresql_search_vector` keeps it up to date. Other dialects get a
+    TEXT column left NULL, see `sqlite_fts`.
+    """
+    return deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
+
+
+def postgresql_search_vector(source: Table, *columns: str) -> None:
+    """
+    Fill the `search_vector` of `source` from `columns` on PostgreSQL.
+
+    A trigger rather than a generated column, the migration can then add
+    the column and backfill it without rewriting the table under lock.
+
+    :param source: the table holding a `search_vector` column.
+    :param columns: the text columns to index.
+    """
+    names = ", ".join(columns)
+    event.listen(
+        source,
+        "after_create",
+        DDL(
+            f"CREATE TRIGGER {source.name}_search_vector "
+            f"BEFORE INSERT OR UPDATE OF {names} ON {source.name} FOR EACH ROW "
+            "EXECUTE FUNCTION tsvector_update_trigger"
+            f"(search_vector, 'pg_catalog.{SEARCH_CONFIG}', {names})"
+        ).execute_if(dialect="postgresql"),
+    )
+
+
+def sqlite_fts(source: Table, *columns: str) -> TableClause:
+    """
+    Mirror `columns` of `source` into an FTS5 external content table on SQLite.
+
+    Triggers keep the index in sync with the source rows.
+
+    :param source: the table to index, its integer primary key is the FTS rowid.
+    :param columns: the text columns to index.
+    :return: the FTS table, its `rowid` joins the source primary key.
+    """
+    name = f"{source.name}_fts"
+    names = ", ".join(columns)
+    new = ", ".join(f"new.{column_name}" for column_name in columns)
+    old = ", ".join(f"old.{column_name}" for column_name in columns)
+    insert_new = f"INSERT INTO {name}(rowid, {names}) VALUES (new.id, {new});"
+    delete_old = (
+        f"INSERT INTO {name}({name}, rowid, {names}) VALUES ('delete', old.id, {old});"
+    )
+    statements = [
+        f"CREATE VIRTUAL TABLE {name} USING fts5({names}, content='{source.name}', "
+        "content_rowid='id')",
+        f"CREATE TRIGGER {name}_ai AFTER INSERT ON {source.name} BEGIN {insert_new} END",
+        f"CREATE TRIGGER {name}_ad AFTER DELETE ON {source.name} BEGIN {delete_old} END",
+        f"CREATE TRIGGER {name}_au AFTER UPDATE ON {source.name} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+    for statement in statements:
+        event.listen(
+            source, "after_create", DDL(statement).execute_if(dialect="sqlite")
+        )
+    event.listen(
+        source,
+        "before_drop",
+        DDL(f"DROP TABLE IF EXISTS {name}").execute_if(dialect="sqlite"),
+    )
+    return table(name, column("rowid"), column("rank"))
+
+
+def fts_query(query: str) -> str:
+    """Quote every word of a user query so it is a plain FTS5 AND of terms"""
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", query))
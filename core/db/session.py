@@ -1,9 +1,15 @@
+import asyncio
+import itertools
+import logging
+import os
 from contextlib import asynccontextmanager
 from contextvars import Token
 from enum import Enum
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Hashable
 
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_scoped_session,
     async_sessionmaker,
@@ -12,9 +18,19 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import Delete, Insert, Update
 
-from core.contexts import database_session_context
+from core.cache import TTLCache
+from core.contexts import (
+    RoutingState,
+    database_routing_context,
+    database_session_context,
+)
+from core.db.pool import TimedQueuePool
+from core.db.stats import instrument
+from core.metrics import Gauge
 from core.settings.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 def get_session_context() -> str:
     return database_session_context.get()
@@ -28,23 +44,209 @@ def reset_session_context(context: Token) -> None:
     database_session_context.reset(context)
 
 
+def set_routing_context(use_primary: bool) -> Token:
+    return database_routing_context.set(RoutingState(use_primary=use_primary))
+
+
+def get_routing_context() -> RoutingState | None:
+    return database_routing_context.get()
+
+
+def reset_routing_context(context: Token) -> None:
+    database_routing_context.reset(context)
+
+
+# Users who wrote in the last `primary_sticky_seconds`, whatever their client
+recent_writers = TTLCache(
+    maxsize=settings.primary_sticky_users, ttl=settings.primary_sticky_seconds
+)
+
+
+def stick_to_primary(*user_ids: Hashable) -> None:
+    """Serve the reads of `user_ids` from the primary until replicas caught up"""
+    for user_id in user_ids:
+        recent_writers.set(str(user_id), True)
+
+
+def set_routing_user(user_id: Hashable) -> None:
+    """Route the rest of the request as the authenticated `user_id`"""
+    routing = get_routing_context()
+    if routing is not None:
+        routing.user_id = str(user_id)
+
+
 class EngineType(Enum):
     READER_WRITER = "reader_writer"
+    READER = "reader"
+
+
+engines: dict[EngineType, AsyncEngine] = {}
+reader_engines: list[AsyncEngine] = []
+_reader_rotation = itertools.count()
+
+
+def create_engine(url: str) -> AsyncEngine:
+    options = dict(
+        pool_pre_ping=settings.database_pool_pre_ping,
+        pool_recycle=settings.database_pool_recycle,
+    )
+    # SQLite runs on a NullPool/StaticPool which has nothing to size
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+        )
+    engine = create_async_engine(url, **options)
+    instrument(engine.sync_engine)
+    return engine
+
+
+def init_engines() -> None:
+    """
+    Create the engines of this process.
+
+    Engines are built lazily, or from the application lifespan, so every
+    forked worker owns its pool instead of sharing the parent's sockets.
+    """
+    if engines:
+        return
+    engines[EngineType.READER_WRITER] = create_engine(settings.database_url)
+    reader_engines[:] = [create_engine(url) for url in settings.reader_database_urls]
+
 
+async def warm_up_engines(connections: int) -> None:
+    """
+    Open `connections` pooled connections per engine ahead of the traffic.
 
-engines = {
-    EngineType.READER_WRITER: create_async_engine(
-        settings.database_url, pool_recycle=3600
-    ),
-}
+    A database that refuses connections does not stop the worker from
+    starting, the pool connects lazily later on and readiness reports the
+    database as down meanwhile.
+    """
+    init_engines()
+    for engine in [*engines.values(), *reader_engines]:
+        opened = await asyncio.gather(
+            *(engine.connect() for _ in range(connections)), return_exceptions=True
+        )
+        # Return what did connect to the pool
+        for connection in opened:
+            if not isinstance(connection, BaseException):
+                await connection.close()
+        errors = [error for error in opened if isinstance(error, BaseException)]
+        if errors:
+            logger.warning(
+                "Could not warm up %s of %s connections to %s",
+                len(errors),
+                connections,
+                engine.url.render_as_string(hide_password=True),
+                exc_info=errors[0],
+            )
+
+
+async def dispose_engines() -> None:
+    for engine in [*engines.values(), *reader_engines]:
+        await engine.dispose()
+    engines.clear()
+    reader_engines.clear()
+
+
+def _forget_inherited_pools() -> None:
+    # The child must not use, nor close, the connections of its parent
+    for engine in [*engines.values(), *reader_engines]:
+        engine.sync_engine.dispose(close=False)
+
+
+os.register_at_fork(after_in_child=_forget_inherited_pools)
+
+
+def _pool_gauge(name: str, documentation: str, read, aggregate: str = "sum") -> Gauge:
+    """A gauge of every engine's pool, labelled primary or replica-<n>"""
+
+    def collect() -> dict[tuple[str], float]:
+        pools = {}
+        if EngineType.READER_WRITER in engines:
+            pools["primary"] = engines[EngineType.READER_WRITER].sync_engine.pool
+        for i, engine in enumerate(reader_engines):
+            pools[f"replica-{i}"] = engine.sync_engine.pool
+        return {
+            (label,): read(pool)
+            for label, pool in pools.items()
+            if isinstance(pool, TimedQueuePool)
+        }
+
+    return Gauge(
+        name, documentation, ("engine",), callback=collect, aggregate=aggregate
+    )
+
+
+_pool_gauge("db_pool_size", "Connections the pool keeps", lambda pool: pool.size())
+_pool_gauge("db_pool_checked_out", "Connections in use", lambda pool: pool.checkedout())
+_pool_gauge(
+    "db_pool_overflow",
+    "Connections opened over the pool size",
+    lambda pool: max(pool.overflow(), 0),
+)
+_pool_gauge(
+    "db_pool_waiting", "Checkouts waiting for a connection", lambda pool: pool.waiting()
+)
+_pool_gauge(
+    "db_pool_wait_seconds",
+    "How long the oldest waiting checkout has waited",
+    lambda pool: pool.oldest_wait(),
+    aggregate="max",
+)
+
+
+def _checked_out(engine: AsyncEngine) -> int:
+    checkedout = getattr(engine.sync_engine.pool, "checkedout", None)
+    return checkedout() if checkedout is not None else 0
+
+
+def routed_engines() -> list[AsyncEngine]:
+    """
+    The engines a request would use now, the primary and the least busy
+    replica, read without moving the round-robin of `get_engine` along.
+    """
+    if EngineType.READER_WRITER not in engines:
+        return []
+    routed = [engines[EngineType.READER_WRITER]]
+    if reader_engines:
+        routed.append(min(reader_engines, key=_checked_out))
+    return routed
+
+
+def get_engine(engine_type: EngineType) -> AsyncEngine:
+    """
+    Resolve an engine type to an engine.
+
+    Readers are picked by the fewest checked out connections, starting from a
+    rotating offset so equally busy replicas are used round-robin. Without any
+    configured replica the reader falls back to the reader/writer engine.
+    """
+    init_engines()
+    if engine_type is EngineType.READER and reader_engines:
+        start = next(_reader_rotation) % len(reader_engines)
+        candidates = reader_engines[start:] + reader_engines[:start]
+        return min(candidates, key=_checked_out)
+    return engines[EngineType.READER_WRITER]
 
 
 class RoutingSession(Session):
     def get_bind(self, mapper=None, clause=None, **kw):
+        routing = get_routing_context()
         if self._flushing or isinstance(clause, (Update, Delete, Insert)):
-            return engines[EngineType.READER_WRITER].sync_engine
-        else:
-            return engines[EngineType.READER_WRITER].sync_engine
+            if routing is not None:
+                # Read your writes, the rest of the request stays on the primary
+                routing.use_primary = routing.wrote = True
+                if routing.user_id is not None:
+                    stick_to_primary(routing.user_id)
+            return get_engine(EngineType.READER_WRITER).sync_engine
+        if routing is None or routing.use_primary:
+            return get_engine(EngineType.READER_WRITER).sync_engine
+        if routing.user_id is not None and recent_writers.get(routing.user_id):
+            return get_engine(EngineType.READER_WRITER).sync_engine
+        return get_engine(EngineType.READER).sync_engine
 
 
 _async_session_factory = async_sessionmaker(
@@ -59,11 +261,13 @@ session = async_scoped_session(
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    _session = async_sessionmaker(
-        class_=AsyncSession,
-        sync_session_class=RoutingSession,
-        expire_on_commit=False,
-    )()
+    """
+    Yield the request scoped session.
+
+    Repositories, the user database and `unit_of_work` all share this session,
+    so a request checks out a single pooled connection per engine.
+    """
+    _session = session()
     try:
         yield _session
     finally:
@@ -72,11 +276,8 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
 
 @asynccontextmanager
 async def session_factory() -> AsyncGenerator[AsyncSession, None]:
-    _session = async_sessionmaker(
-        class_=AsyncSession,
-        sync_session_class=RoutingSession,
-        expire_on_commit=False,
-    )()
+    """A standalone session, for work that runs outside of a request."""
+    _session = _async_session_factory()
     try:
         yield _session
     finally:
@@ -0,0 +1,87 @@
+import hashlib
+import re
+import time
+from collections import Counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.contexts import database_query_stats
+from core.metrics import Histogram
+
+statement_duration = Histogram(
+    "db_statement_duration_seconds",
+    "Time spent executing a statement",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|:\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """The statement with its placeholders and IN lists folded, the same query always matches"""
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+class QueryStats(object):
+    """The statements one request executed and the time spent on them"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter[str] = Counter()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        """Statements executed at least `threshold` times, the mark of an N+1"""
+        return {
+            statement: count
+            for statement, count in self.fingerprints.items()
+            if count >= threshold
+        }
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.1f};desc="{self.count} queries"'
+
+    def as_log(self, threshold: int) -> dict:
+        return {
+            "db_statements": self.count,
+            "db_time_ms": round(self.duration * 1000, 1),
+            "db_repeated": {
+                hashlib.sha1(statement.encode()).hexdigest()[:8]: {
+                    "count": count,
+                    "statement": statement[:200],
+                }
+                for statement, count in self.repeated(threshold).items()
+            },
+        }
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+    statement_duration.observe(duration)
+    stats = database_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+def instrument(engine: Engine) -> None:
+    """Record the statements of `engine` into the `QueryStats` of the current request, and their duration"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
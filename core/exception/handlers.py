@@ -1,6 +1,10 @@
 from fastapi import Request
 from sqlalchemy.exc import IntegrityError
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
+
+from core.conditional import NotModified
+from core.db.pagination import InvalidCursor
+from core.executor import ExecutorSaturated
 
 
 async def generic_db_error_handler(
@@ -10,3 +14,21 @@ async def generic_db_error_handler(
         status_code=422,
         content={"detail": "Violation Error, Request was not processed"},
     )
+
+
+async def executor_saturated_handler(
+    request: Request, exc: ExecutorSaturated
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers=exc.headers)
+
+
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"detail": "Invalid cursor"})
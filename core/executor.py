@@ -0,0 +1,44 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(Exception):
+    """Raised when a `BoundedExecutor` already holds its maximum of pending jobs."""
+
+    def __init__(self, name: str, retry_after: int = 1) -> None:
+        super().__init__(f"{name} executor is saturated")
+        self.retry_after = retry_after
+
+
+class BoundedExecutor(object):
+    """
+    Runs blocking calls off the event loop on a dedicated thread pool.
+
+    At most `max_pending` calls, running or queued, are accepted at a time,
+    further calls fail fast with `ExecutorSaturated` instead of queueing
+    without bound.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_pending: int) -> None:
+        self.name = name
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self.pending >= self.max_pending:
+            raise ExecutorSaturated(self.name)
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
@@ -0,0 +1,106 @@
+import asyncio
+import math
+import time
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from core.cache.singleflight import SingleFlight
+from core.db.pool import TimedQueuePool
+from core.db.session import EngineType, get_engine
+from core.settings.config import settings
+
+
+class Readiness(object):
+    """
+    Whether this worker can serve traffic, checked on the pool of the primary.
+
+    The check checks out a pooled connection and runs `SELECT 1` within
+    `timeout` seconds. A pool whose oldest waiting checkout has waited over
+    `max_pool_wait` is not ready right away, like `LoadSheddingMiddleware`
+    sheds, nor is one with over `max_pool_waiting` checkouts queued, so the
+    worker stops getting traffic before it has to shed. A pool with every
+    connection out but keeping up is ready, without queueing one more
+    checkout behind the requests. Results are reused for
+    `ttl` seconds and concurrent probes share one check, probes add no load.
+    """
+
+    def __init__(
+        self,
+        engine: Callable[[], AsyncEngine],
+        timeout: float,
+        ttl: float,
+        max_pool_wait: float,
+        max_pool_waiting: int,
+    ) -> None:
+        self.engine = engine
+        self.timeout = timeout
+        self.ttl = ttl
+        self.max_pool_wait = max_pool_wait
+        self.max_pool_waiting = max_pool_waiting
+        self._result: tuple[bool, dict] = (False, {})
+        self._checked_at = -math.inf
+        self._flights = SingleFlight()
+
+    async def check(self) -> tuple[bool, dict]:
+        if time.monotonic() - self._checked_at < self.ttl:
+            return self._result
+        return await self._flights.do("ready", self._check)
+
+    async def _check(self) -> tuple[bool, dict]:
+        engine = self.engine()
+        pool = engine.sync_engine.pool
+        report = {}
+        if isinstance(pool, TimedQueuePool):
+            report["pool"] = pool.status()
+
+        timed = isinstance(pool, TimedQueuePool)
+        if (
+            timed
+            and pool.waiting() > 0
+            and (
+                pool.oldest_wait() > self.max_pool_wait
+                or pool.waiting() > self.max_pool_waiting
+            )
+        ):
+            ready = False
+            report["database"] = {"status": "pool saturated"}
+        elif timed and pool.exhausted():
+            ready = True
+            report["database"] = {"status": "busy"}
+        else:
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._ping(engine), self.timeout)
+            except (asyncio.TimeoutError, OSError, SQLAlchemyError) as e:
+                ready = False
+                report["database"] = {
+                    "status": "unavailable",
+                    "error": type(e).__name__,
+                }
+            else:
+                ready = True
+                report["database"] = {
+                    "status": "ok",
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                }
+
+        self._result = (ready, report)
+        self._checked_at = time.monotonic()
+        return self._result
+
+    @staticmethod
+    async def _ping(engine: AsyncEngine) -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+
+readiness = Readiness(
+    lambda: get_engine(EngineType.READER_WRITER),
+    timeout=settings.readiness_timeout,
+    ttl=settings.readiness_cache_seconds,
+    max_pool_wait=settings.readiness_max_pool_wait,
+    max_pool_waiting=settings.readiness_max_pool_waiting,
+)
@@ -0,0 +1,9 @@
+from .registry import REGISTRY, Counter, Gauge, Histogram, Registry
+
+__all__ = [
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+]
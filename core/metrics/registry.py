@@ -0,0 +1,414 @@
+import abc
+import asyncio
+import fcntl
+import json
+import logging
+import math
+import os
+import tempfile
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Union
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+# The counters and histograms of stopped workers, next to the snapshots
+ARCHIVE = "archive.json"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Metric(abc.ABC):
+    """
+    A named family of samples, one per combination of label values.
+
+    Metrics are updated from the event loop thread only, plain dicts hold
+    their values and no lock is taken on the request path.
+    """
+
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: Optional["Registry"] = None,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes the labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    @abc.abstractmethod
+    def samples(self) -> list[Sample]:
+        ...
+
+
+Callback = Callable[[], Union[float, dict[LabelValues, float]]]
+
+
+class Value(Metric):
+    """
+    One value per label values, or read from `callback` at collection time.
+
+    `callback` returns the value, or a dict of values by label values.
+    """
+
+    suffix = ""
+
+    def __init__(self, *args, callback: Optional[Callback] = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+        self._values: dict[LabelValues, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self._values[self._key(labels)] += amount
+
+    def samples(self) -> list[Sample]:
+        values = list(self._values.items())
+        if self.callback is not None:
+            collected = self.callback()
+            if not isinstance(collected, dict):
+                collected = {(): collected}
+            values = [(tuple(map(str, key)), value) for key, value in collected.items()]
+        return [
+            (f"{self.name}{self.suffix}", self._labels(key), value)
+            for key, value in values
+        ]
+
+
+class Counter(Value):
+    type = "counter"
+    suffix = "_total"
+
+
+class Gauge(Value):
+    """A value going up and down, summed across workers or reduced with max when `aggregate` is "max"."""
+
+    type = "gauge"
+
+    def __init__(self, *args, aggregate: str = "sum", **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.aggregate = aggregate
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self._values[self._key(labels)] -= amount
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values, the count of each bucket then of +Inf, and the sum
+        self._values: dict[LabelValues, list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        values = self._values.get(key)
+        if values is None:
+            values = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[i] += 1
+                break
+        else:
+            values[len(self.buckets)] += 1
+        values[-1] += value
+
+    def samples(self) -> list[Sample]:
+        samples = []
+        for key, values in list(self._values.items()):
+            labels = self._labels(key)
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), values):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                samples.append(
+                    (f"{self.name}_bucket", {**labels, "le": le}, cumulative)
+                )
+            samples.append((f"{self.name}_sum", labels, values[-1]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class Registry(object):
+    """
+    The metrics of this process, rendered in the Prometheus text format.
+
+    With a `directory`, every worker writes a snapshot of its samples there
+    and rendering aggregates the snapshots of all workers, whichever worker
+    the scrape lands on. The counters and histograms of a stopped worker are
+    folded into an archive so totals never go back, its gauges are dropped.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self.directory: Optional[Path] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._process: Optional[dict] = None
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self.metrics:
+            raise ValueError(f"{metric.name} is already registered")
+        self.metrics[metric.name] = metric
+
+    def collect(self) -> dict[str, dict]:
+        snapshot = {}
+        for metric in self.metrics.values():
+            snapshot[metric.name] = {
+                "type": metric.type,
+                "help": metric.documentation,
+                "aggregate": getattr(metric, "aggregate", "sum"),
+                "samples": metric.samples(),
+            }
+        return snapshot
+
+    @property
+    def snapshot_path(self) -> Path:
+        """
+        The snapshot of this process, named after its pid and a token of its
+        own so a later process reusing the pid never overwrites it.
+        """
+        pid = os.getpid()
+        if self._process is None or self._process["pid"] != pid:
+            self._process = {
+                "pid": pid,
+                "token": uuid.uuid4().hex[:12],
+                "started": _started(pid),
+            }
+        return self.directory / f"{pid}-{self._process['token']}.json"
+
+    def write_snapshot(self, collected: Optional[dict[str, dict]] = None) -> None:
+        if self.directory is None:
+            return
+        if collected is None:
+            collected = self.collect()
+        path = self.snapshot_path
+        # A temporary file of its own, the flusher and /metrics write at once
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.directory, prefix=f"{path.stem}-", suffix=".tmp", delete=False
+        ) as temporary:
+            temporary.write(
+                json.dumps({"started": self._process["started"], "metrics": collected})
+            )
+        # Readers never see a half written snapshot
+        os.replace(temporary.name, path)
+
+    def retire_snapshot(self) -> None:
+        """Fold the snapshot of this worker into the archive, as it stops"""
+        if self.directory is not None:
+            self.write_snapshot()
+            self._retire(self.snapshot_path)
+
+    async def start(self, directory: str, interval: float) -> None:
+        """Share the samples of this worker through `directory`, every `interval` seconds"""
+        if not directory or self._flusher is not None:
+            return
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Named on the event loop, before writers in threads need the name
+        self.snapshot_path
+        self._flusher = asyncio.create_task(self._flush(interval))
+
+    async def stop(self) -> None:
+        if self._flusher is None:
+            return
+        self._flusher.cancel()
+        try:
+            await self._flusher
+        except asyncio.CancelledError:
+            pass
+        self._flusher = None
+        self.retire_snapshot()
+        self.directory = None
+
+    async def _flush(self, interval: float) -> None:
+        while True:
+            try:
+                # Collected on the event loop, written off it
+                await run_in_threadpool(self.write_snapshot, self.collect())
+            except OSError:
+                logger.warning("Could not write the metrics snapshot", exc_info=True)
+            await asyncio.sleep(interval)
+
+    @contextmanager
+    def _locked(self, operation: int):
+        """Hold the lock of the archive, shared to read it, exclusive to fold into it"""
+        with open(self.directory / "archive.lock", "a") as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def _read_archive(self) -> dict[str, dict]:
+        try:
+            return json.loads((self.directory / ARCHIVE).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _snapshots(self) -> list[dict]:
+        """
+        The samples of every worker, stopped ones through the archive.
+
+        They are read under the lock of the archive, a worker being folded
+        into it is counted once, never twice nor missed. The snapshots of
+        workers found stopped are folded in afterwards.
+        """
+        snapshots = []
+        stopped = []
+        with self._locked(fcntl.LOCK_SH):
+            snapshots.append(self._read_archive())
+            for path in self.directory.glob("*.json"):
+                pid = path.stem.partition("-")[0]
+                if not pid.isdigit():
+                    continue
+                try:
+                    snapshot = json.loads(path.read_text())
+                    metrics = snapshot["metrics"]
+                except (OSError, ValueError, KeyError):
+                    continue
+                if not _alive(int(pid), snapshot.get("started")):
+                    stopped.append(path)
+                    metrics = _cumulative(metrics)
+                snapshots.append(metrics)
+        for path in stopped:
+            self._retire(path)
+        return snapshots
+
+    def _retire(self, path: Path) -> None:
+        """Fold the counters and histograms of a stopped worker into the archive"""
+        with self._locked(fcntl.LOCK_EX):
+            # Whichever worker takes the lock first folds it, the others find it gone
+            try:
+                metrics = json.loads(path.read_text())["metrics"]
+            except FileNotFoundError:
+                return
+            except (OSError, ValueError, KeyError):
+                metrics = {}
+            archive = _aggregate([self._read_archive(), _cumulative(metrics)])
+            temporary = self.directory / f"{ARCHIVE}.tmp"
+            temporary.write_text(json.dumps(archive))
+            os.replace(temporary, self.directory / ARCHIVE)
+            path.unlink(missing_ok=True)
+
+    def render(self, collected: Optional[dict[str, dict]] = None) -> str:
+        """
+        The samples of every worker in the Prometheus text format.
+
+        It reads and locks the files of the other workers, run it off the
+        event loop, with `collected` the samples of this worker taken on it.
+        """
+        if collected is None:
+            collected = self.collect()
+        if self.directory is None:
+            snapshots = [collected]
+        else:
+            self.write_snapshot(collected)
+            snapshots = self._snapshots()
+
+        lines = []
+        for name, family in _aggregate(snapshots).items():
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            for sample, labels, value in family["samples"]:
+                lines.append(
+                    f"{sample}{_format_labels(labels.items())} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _aggregate(snapshots: Iterable[dict[str, dict]]) -> dict[str, dict]:
+    """Merge snapshots, summing the samples of each family or taking their max"""
+    families: dict[str, dict] = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            merged = families.setdefault(name, {**family, "samples": {}})
+            reduce = max if family["aggregate"] == "max" else sum
+            for sample, labels, value in family["samples"]:
+                key = (sample, tuple(sorted(labels.items())))
+                previous = merged["samples"].get(key)
+                if previous is not None:
+                    value = reduce((previous[1], value))
+                merged["samples"][key] = (labels, value)
+    for family in families.values():
+        family["samples"] = [
+            (sample, labels, value)
+            for (sample, _), (labels, value) in family["samples"].items()
+        ]
+    return families
+
+
+def _cumulative(snapshot: dict[str, dict]) -> dict[str, dict]:
+    """The counters and histograms of a snapshot, what outlives its worker"""
+    return {
+        name: family
+        for name, family in snapshot.items()
+        if family["type"] in ("counter", "histogram")
+    }
+
+
+def _started(pid: int) -> Optional[str]:
+    """
+    When `pid` started, as the boot id and its start time in clock ticks
+    since boot, or None where /proc is missing.
+    """
+    try:
+        boot_id = Path("/proc/sys/kernel/random/boot_id").read_text().strip()
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # The command name may hold spaces and parentheses, starttime is the
+    # 20th field after it
+    return f"{boot_id}:{stat.rpartition(')')[2].split()[19]}"
+
+
+def _alive(pid: int, started: Optional[str]) -> bool:
+    """Whether `pid` runs and is still the process that wrote a snapshot started at `started`"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    if started is None:
+        return True
+    return _started(pid) in (started, None)
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+REGISTRY = Registry()
@@ -0,0 +1,147 @@
+import asyncio
+from collections import deque
+from enum import IntEnum
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.db.pool import TimedQueuePool
+from core.db.session import routed_engines
+from core.metrics import Counter
+from core.settings.config import settings
+
+
+requests_shed = Counter(
+    "http_requests_shed", "Requests turned away with a 503", ("priority",)
+)
+
+
+class Priority(IntEnum):
+    LOW = 0
+    NORMAL = 1
+    CRITICAL = 2
+
+
+def routed_pools() -> list[TimedQueuePool]:
+    """
+    The pools a request would check out from now, the primary's for its
+    writes and the one of the replica its reads are routed to.
+    """
+    pools = dict.fromkeys(engine.sync_engine.pool for engine in routed_engines())
+    return [pool for pool in pools if isinstance(pool, TimedQueuePool)]
+
+
+class LoadSheddingMiddleware:
+    """
+    Turn requests away with a fast 503 and Retry-After under overload,
+    instead of letting them queue on the connection pool until it times out.
+
+    Requests are classed by path prefix. Critical ones, health checks and
+    auth, always pass. Normal ones take one of `max_in_flight` slots,
+    waiting at most `queue_timeout` for one, and are turned away while the
+    oldest checkout on a pool the request would use, the primary's or the
+    routed replica's, has waited over `max_pool_wait`. Low priority ones
+    never wait, only get half of the slots and are also turned away as soon
+    as one of those pools has every connection checked out.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_in_flight: int = settings.load_shed_max_in_flight,
+        queue_timeout: float = settings.load_shed_queue_timeout,
+        max_pool_wait: float = settings.load_shed_max_pool_wait,
+        retry_after: int = settings.load_shed_retry_after,
+        critical_paths: list[str] = settings.load_shed_critical_paths,
+        low_priority_paths: list[str] = settings.load_shed_low_priority_paths,
+    ) -> None:
+        self.app = app
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.max_pool_wait = max_pool_wait
+        self.retry_after = retry_after
+        self.critical_paths = critical_paths
+        self.low_priority_paths = low_priority_paths
+        self.in_flight = 0
+        self.shed = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+        priority = self.priority(scope["path"])
+        if priority is Priority.CRITICAL:
+            await self.app(scope, receive, send)
+            return
+
+        if self.overloaded(priority) or not await self.acquire(priority):
+            self.shed += 1
+            requests_shed.inc(priority=priority.name.lower())
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service is busy, please retry later"},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.release()
+
+    def priority(self, path: str) -> Priority:
+        def matches(prefixes: list[str]) -> bool:
+            return any(
+                path == prefix or path.startswith(prefix.rstrip("/") + "/")
+                for prefix in prefixes
+            )
+
+        if matches(self.critical_paths):
+            return Priority.CRITICAL
+        if matches(self.low_priority_paths):
+            return Priority.LOW
+        return Priority.NORMAL
+
+    def overloaded(self, priority: Priority) -> bool:
+        pools = routed_pools()
+        if any(pool.oldest_wait() > self.max_pool_wait for pool in pools):
+            return True
+        return priority is Priority.LOW and any(pool.exhausted() for pool in pools)
+
+    async def acquire(self, priority: Priority) -> bool:
+        """Take an in-flight slot, normal requests wait in line for one"""
+        limit = self.max_in_flight
+        if priority is Priority.LOW:
+            limit //= 2
+        if self.in_flight < limit and not self._waiters:
+            self.in_flight += 1
+            return True
+        if priority is Priority.LOW or self.queue_timeout <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over as the timeout fired
+            return waiter.done() and not waiter.cancelled()
+        except asyncio.CancelledError:
+            # A slot handed over right before the cancellation goes to the next
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        return True
+
+    def release(self) -> None:
+        """Hand the slot over to the next waiting request, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
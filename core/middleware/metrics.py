@@ -0,0 +1,58 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import Counter, Gauge, Histogram
+
+requests_total = Counter(
+    "http_requests",
+    "Requests served, by route template and status",
+    ("method", "route", "status"),
+)
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to the end of the response, by route template",
+    ("method", "route"),
+)
+requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests being served", ("method",)
+)
+
+
+class MetricsMiddleware:
+    """
+    Request count, latency and in-flight metrics, outermost so shed requests count too.
+
+    Routes are labelled with their template, `/task/{task_id}`, keeping the
+    number of series bounded.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            requests_in_flight.dec(method=method)
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            request_duration.observe(
+                time.perf_counter() - started, method=method, route=route
+            )
+            requests_total.inc(method=method, route=route, status=str(status))
@@ -1,8 +1,27 @@
+import logging
 from uuid import uuid4
 
-from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from core.db.session import set_session_context, reset_session_context, session
+from core.contexts import database_query_stats
+from core.db.session import (
+    get_routing_context,
+    reader_engines,
+    reset_routing_context,
+    reset_session_context,
+    session,
+    set_routing_context,
+    set_session_context,
+)
+from core.db.stats import QueryStats
+from core.settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_COOKIE = "db_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
 
 
 class SQLAlchemyMiddleware:
@@ -12,11 +31,76 @@ class SQLAlchemyMiddleware:
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         session_id = str(uuid4())
         context = set_session_context(session_id=session_id)
+        routing_context = set_routing_context(use_primary=self.use_primary(scope))
+        routing = get_routing_context()
+        stats = QueryStats()
+        stats_context = database_query_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and settings.server_timing:
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", stats.server_timing()
+                )
+            if (
+                message["type"] == "http.response.start"
+                and routing.wrote
+                and reader_engines
+            ):
+                # Keep the client's next reads on the primary until replicas catch up
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}=1; Max-Age={settings.primary_sticky_seconds}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
 
         try:
-            await self.app(scope, receive, send)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             raise e
         finally:
             await session.remove()
+            database_query_stats.reset(stats_context)
+            reset_routing_context(context=routing_context)
             reset_session_context(context=context)
+            if scope["type"] == "http":
+                self.log(scope, stats)
+
+    @staticmethod
+    def use_primary(scope: Scope) -> bool:
+        """
+        Unsafe methods and clients that wrote recently are served by the primary.
+
+        Authenticated users are tracked by `recent_writers` once their user is
+        resolved, the cookie only covers clients that keep one otherwise.
+        """
+        if scope["type"] not in ("http", "websocket"):
+            return True
+        if scope["type"] == "http" and scope["method"] not in SAFE_METHODS:
+            return True
+        return PRIMARY_COOKIE in HTTPConnection(scope).cookies
+
+    @staticmethod
+    def log(scope: Scope, stats: QueryStats) -> None:
+        extra = {
+            "method": scope["method"],
+            "path": scope["path"],
+            **stats.as_log(settings.sql_repeated_threshold),
+        }
+        if extra["db_repeated"]:
+            logger.warning(
+                "%s %s repeated statements, a possible N+1",
+                scope["method"],
+                scope["path"],
+                extra=extra,
+            )
+        else:
+            logger.info(
+                "%s %s ran %d statements in %.1fms",
+                scope["method"],
+                scope["path"],
+                extra["db_statements"],
+                extra["db_time_ms"],
+                extra=extra,
+            )
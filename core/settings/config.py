@@ -10,6 +10,61 @@ class Settings(BaseSettings):
     debug: bool = True
     database_url: str = ""
     reader_writer_database_url: str = database_url
+    reader_database_urls: list[str] = []
+    primary_sticky_seconds: int = 5
+    primary_sticky_users: int = 10_000
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30
+    database_pool_pre_ping: bool = False
+    database_pool_recycle: int = 3600
+    database_pool_warm_up: int = 5
+    user_cache_size: int = 10_000
+    user_cache_ttl: float = 5
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    task_bulk_max_size: int = 5000
+    share_bulk_max_size: int = 500
+    sync_page_size: int = 500
+    sync_batch_max_size: int = 1000
+    # Deletions are kept for /sync this long, older cursors get a 410 and resync
+    sync_tombstone_retention_days: int = 30
+    # How often each worker deletes expired tombstones, 0 turns pruning off
+    sync_tombstone_prune_seconds: float = 3600
+    sync_tombstone_prune_batch_size: int = 1000
+    # "memory" or the dotted path of a CacheBackend taking no arguments
+    response_cache_backend: str = "memory"
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    response_cache_ttl: float = 60
+    cache_invalidation_channel: str = "cache_invalidation"
+    cache_invalidation_retry_seconds: float = 5
+    # In-flight requests per worker, 0 turns load shedding off
+    load_shed_max_in_flight: int = 100
+    load_shed_queue_timeout: float = 0.5
+    load_shed_max_pool_wait: float = 1
+    load_shed_retry_after: int = 1
+    load_shed_critical_paths: list[str] = [
+        # Lets /health/ready through under overload, which only holds as its
+        # check runs at most once per readiness_cache_seconds, however many
+        # probes come in
+        "/health",
+        "/metrics",
+        "/user/login",
+        "/user/register",
+    ]
+    load_shed_low_priority_paths: list[str] = ["/search", "/sync", "/task/bulk"]
+    server_timing: bool = True
+    # Statements repeated this many times in a request are logged as an N+1
+    sql_repeated_threshold: int = 5
+    # Shared by the workers of a node to aggregate /metrics, empty for one process
+    metrics_dir: str = ""
+    metrics_flush_seconds: float = 5
+    readiness_timeout: float = 1
+    readiness_cache_seconds: float = 2
+    # Not ready once a checkout has waited this long on the primary pool
+    readiness_max_pool_wait: float = 1
+    # or once more checkouts than this queue on it, however briefly
+    readiness_max_pool_waiting: int = 10
     model_config = SettingsConfigDict(env_file=".env")
     base_dir: Path = Path(__file__).parent.parent.parent
     app_dir: Path = os.path.join(base_dir, "app")
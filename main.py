@@ -1,14 +1,50 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from sqlalchemy.exc import IntegrityError
 
 from app.todo.api import routes as todo_routes
+from app.todo.cache import response_cache
+from app.todo.pruning import tombstone_pruner
 from app.user.auth import fastapi_users, auth_backend
+from app.user.cache import user_cache
 from app.user.schema.request import UserCreateRequestScheme
 from app.user.schema.response import UserCreateResponseScheme
-from core.exception.handlers import generic_db_error_handler
+from core.cache.bus import invalidation_bus
+from core.conditional import NotModified
+from core.db.pagination import InvalidCursor
+from core.health import readiness
+from core.db.session import dispose_engines, warm_up_engines
+from core.exception.handlers import (
+    executor_saturated_handler,
+    generic_db_error_handler,
+    invalid_cursor_handler,
+    not_modified_handler,
+)
+from core.executor import ExecutorSaturated
+from core.metrics import REGISTRY
+from core.middleware.load_shedding import LoadSheddingMiddleware
+from core.middleware.metrics import MetricsMiddleware
 from core.middleware.sqlalchemy import SQLAlchemyMiddleware
+from core.settings.config import settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await warm_up_engines(settings.database_pool_warm_up)
+    await invalidation_bus.start()
+    await REGISTRY.start(settings.metrics_dir, settings.metrics_flush_seconds)
+    await tombstone_pruner.start(settings.sync_tombstone_prune_seconds)
+    yield
+    await tombstone_pruner.stop()
+    await REGISTRY.stop()
+    await invalidation_bus.stop()
+    await dispose_engines()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
@@ -25,13 +61,14 @@ app.include_router(
 app.include_router(todo_routes.router)
 
 app.add_exception_handler(IntegrityError, generic_db_error_handler)
+app.add_exception_handler(ExecutorSaturated, executor_saturated_handler)
+app.add_exception_handler(NotModified, not_modified_handler)
+app.add_exception_handler(InvalidCursor, invalid_cursor_handler)
 
 app.add_middleware(SQLAlchemyMiddleware)
-
-
-# @app.on_event("shutdown")
-# async def on_shutdown():
-#     await engines[EngineType.READER_WRITER].dispose()
+# A shed request never gets a session
+app.add_middleware(LoadSheddingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 @app.get("/health", tags=["health"])
@@ -39,4 +76,34 @@ async def read_root():
     return {"message": "Welcome to the Game 🎮!"}
 
 
+@app.get("/health/live", tags=["health"])
+async def liveness():
+    """The process answers, it never touches the database"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["health"])
+async def ready():
+    """Whether the database is reachable and its pool keeping up, 503 otherwise"""
+    is_ready, report = await readiness.check()
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "not ready", **report},
+    )
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+async def metrics():
+    # Metrics are only updated on the event loop, the files are read off it
+    body = await run_in_threadpool(REGISTRY.render, REGISTRY.collect())
+    return PlainTextResponse(
+        body, media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/health/cache", tags=["health"])
+async def cache_stats():
+    return {"response": response_cache.stats(), "user": user_cache.stats()}
+
+
 ###
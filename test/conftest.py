@@ -1,5 +1,6 @@
 import dataclasses
 import uuid
+from contextlib import contextmanager
 from typing import (
     Any,
     AsyncGenerator,
@@ -20,6 +21,8 @@ from fastapi_users.openapi import OpenAPIResponseType
 from fastapi_users.password import PasswordHelper
 from pydantic import UUID4, SecretStr
 from pytest_mock import MockerFixture
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 
 from app.user.models.user import UserManager as BaseUserManager
 from app.user.schema.request import UserCreateRequestScheme
@@ -282,3 +285,30 @@ def get_test_client():
                 yield test_client
 
     return _get_test_client
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fail when the block runs more than `maximum` statements, on any engine
+    and thread, e.g. `with assert_max_queries(3): test_client.get("/todo/")`.
+    """
+
+    @contextmanager
+    def _assert_max_queries(maximum: int):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(Engine, "before_cursor_execute", record)
+        assert len(statements) <= maximum, (
+            f"{len(statements)} statements, expected at most {maximum}:\n"
+            + "\n".join(statements)
+        )
+
+    return _assert_max_queries
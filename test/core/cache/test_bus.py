@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from core.cache.bus import MAX_PAYLOAD_BYTES, InvalidationBus, InvalidationEvent
+from core.settings.config import settings
+
+
+def bus(database_url="sqlite+aiosqlite:///todo.db", channel="test_invalidation"):
+    return InvalidationBus(database_url, channel, retry_seconds=0.1)
+
+
+@pytest.mark.unittest
+async def test_publish_reaches_local_subscribers():
+    local = bus()
+    received = []
+
+    async def failing(event):
+        raise RuntimeError
+
+    async def subscriber(event):
+        received.append(event)
+
+    local.subscribe(failing)
+    local.subscribe(subscriber)
+    await local.publish("todo", 1, ["a", "b", "a"])
+    assert received == [InvalidationEvent("todo", 1, ("a", "b"))]
+
+
+@pytest.mark.unittest
+def test_payloads_stay_under_the_notify_limit():
+    local = bus()
+    user_ids = tuple(str(i).zfill(36) for i in range(500))
+    payloads = list(local._payloads(InvalidationEvent("share", 1, user_ids)))
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= MAX_PAYLOAD_BYTES for payload in payloads)
+    assert tuple(
+        user_id for payload in payloads for user_id in json.loads(payload)["user_ids"]
+    ) == (user_ids)
+
+
+@pytest.mark.skipif(
+    make_url(settings.database_url).get_backend_name() != "postgresql",
+    reason="LISTEN/NOTIFY needs PostgreSQL",
+)
+async def test_events_reach_other_workers():
+    publisher, listener = bus(settings.database_url), bus(settings.database_url)
+    received = {publisher: [], listener: []}
+    for worker in received:
+
+        async def subscriber(event, worker=worker):
+            received[worker].append(event)
+
+        worker.subscribe(subscriber)
+    await publisher.start()
+    await listener.start()
+    try:
+        for _ in range(50):
+            if publisher._connection and listener._connection:
+                break
+            await asyncio.sleep(0.1)
+        await publisher.publish("todo", 1, ["a"])
+        event = InvalidationEvent("todo", 1, ("a",))
+        for _ in range(50):
+            if event in received[listener]:
+                break
+            await asyncio.sleep(0.1)
+        # Connecting resets, then the event, published once per worker
+        assert received[listener] == [None, event]
+        assert received[publisher] == [None, event]
+    finally:
+        await publisher.stop()
+        await listener.stop()
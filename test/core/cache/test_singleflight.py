@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from core.cache import SingleFlight
+
+
+def counting(calls: list, result=None, error=None):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if error is not None:
+            raise error
+        return result
+
+    return load
+
+
+@pytest.mark.unittest
+async def test_concurrent_calls_share_one_load():
+    flights = SingleFlight()
+    calls = []
+    results = await asyncio.gather(
+        *(flights.do("k", counting(calls, result=[1])) for _ in range(10))
+    )
+    assert calls == [1]
+    assert results == [[1]] * 10
+    assert flights.shared == 9
+    # Done flights are forgotten
+    await flights.do("k", counting(calls))
+    assert len(calls) == 2
+
+
+@pytest.mark.unittest
+async def test_distinct_keys_load_separately():
+    flights = SingleFlight()
+    calls = []
+    await asyncio.gather(
+        flights.do("a", counting(calls)), flights.do("b", counting(calls))
+    )
+    assert len(calls) == 2
+
+
+@pytest.mark.unittest
+async def test_errors_are_shared():
+    flights = SingleFlight()
+    calls = []
+    results = await asyncio.gather(
+        *(flights.do("k", counting(calls, error=ValueError())) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert calls == [1]
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.unittest
+async def test_cancelled_leader_hands_over():
+    flights = SingleFlight()
+    calls = []
+    leader = asyncio.create_task(flights.do("k", counting(calls, result="leader")))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("k", counting(calls, result="own")))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await follower == "own"
+    assert len(calls) == 2
@@ -0,0 +1,41 @@
+import pytest
+
+from core.cache import TTLCache
+
+
+@pytest.mark.unittest
+def test_hits_and_misses():
+    cache = TTLCache(maxsize=2, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+@pytest.mark.unittest
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+@pytest.mark.unittest
+def test_entries_expire(mocker):
+    monotonic = mocker.patch("core.cache.ttl.time.monotonic", return_value=100.0)
+    cache = TTLCache(maxsize=2, ttl=5)
+    cache.set("a", 1)
+    monotonic.return_value = 106.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+@pytest.mark.unittest
+def test_zero_ttl_disables_the_cache():
+    cache = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+
+from core.cache import MemoryBackend, VersionedCache
+
+
+class Item(BaseModel):
+    id: int
+
+
+ITEMS = TypeAdapter(list[Item])
+
+
+def loader(calls: list, *ids: int):
+    async def load():
+        calls.append(ids)
+        return [{"id": i} for i in ids]
+
+    return load
+
+
+@pytest.mark.unittest
+async def test_results_are_cached_per_params():
+    cache = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    calls = []
+    assert await cache.get_or_load("u", "items", (0,), ITEMS, loader(calls, 1)) == [
+        Item(id=1)
+    ]
+    assert await cache.get_or_load("u", "items", (0,), ITEMS, loader(calls, 1)) == [
+        Item(id=1)
+    ]
+    await cache.get_or_load("u", "items", (1,), ITEMS, loader(calls, 2))
+    await cache.get_or_load("v", "items", (0,), ITEMS, loader(calls, 3))
+    assert calls == [(1,), (2,), (3,)]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 3, 0.25)
+
+
+@pytest.mark.unittest
+async def test_invalidate_only_reloads_the_namespace():
+    cache = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    calls = []
+    await cache.get_or_load("u", "items", (), ITEMS, loader(calls, 1))
+    await cache.get_or_load("v", "items", (), ITEMS, loader(calls, 2))
+    await cache.invalidate("u")
+    assert await cache.get_or_load("u", "items", (), ITEMS, loader(calls, 3)) == [
+        Item(id=3)
+    ]
+    await cache.get_or_load("v", "items", (), ITEMS, loader(calls, 4))
+    assert calls == [(1,), (2,), (3,)]
+
+
+@pytest.mark.unittest
+async def test_version_changes_on_invalidate_and_clear():
+    cache = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    version = await cache.version("u")
+    assert await cache.version("u") == version
+
+    await cache.invalidate("v")
+    assert await cache.version("u") == version
+    await cache.invalidate("u")
+    invalidated = await cache.version("u")
+    assert invalidated != version
+
+    # Bumps may have been missed, no earlier version is current any more
+    cache.clear()
+    assert await cache.version("u") not in (version, invalidated)
+
+    # Another process counts its own versions from 0
+    other = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    assert await other.version("u") != version
+
+
+@pytest.mark.unittest
+async def test_version_expires_with_the_entries(mocker):
+    monotonic = mocker.patch("core.cache.backend.time.monotonic", return_value=100.0)
+    cache = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    version = await cache.version("u")
+    monotonic.return_value = 119.0
+    assert await cache.version("u") == version
+    # A bump missed meanwhile is not served past the ttl
+    monotonic.return_value = 121.0
+    assert await cache.version("u") != version
+
+    uncached = VersionedCache(MemoryBackend(max_bytes=1024, ttl=0))
+    assert await uncached.version("u") != await uncached.version("u")
+
+
+@pytest.mark.unittest
+async def test_backend_evicts_least_recently_used_over_max_bytes():
+    backend = MemoryBackend(max_bytes=20, ttl=60)
+    await backend.set("a", b"12345678")
+    await backend.set("b", b"12345678")
+    await backend.get("a")
+    await backend.set("c", b"12345678")
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"12345678"
+    assert backend.stats() == {"entries": 2, "bytes": 18, "evictions": 1}
+    # Larger than the whole cache, never stored
+    await backend.set("d", b"x" * 20)
+    assert await backend.get("d") is None
+
+
+@pytest.mark.unittest
+async def test_backend_entries_expire(mocker):
+    monotonic = mocker.patch("core.cache.backend.time.monotonic", return_value=100.0)
+    backend = MemoryBackend(max_bytes=1024, ttl=5)
+    await backend.set("a", b"1")
+    monotonic.return_value = 106.0
+    assert await backend.get("a") is None
+    assert backend.stats()["bytes"] == 0
+
+
+@pytest.mark.unittest
+async def test_concurrent_misses_can_coalesce():
+    cache = VersionedCache(MemoryBackend(max_bytes=1024, ttl=60))
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [{"id": 1}]
+
+    results = await asyncio.gather(
+        *(
+            cache.get_or_load("u", "items", (), ITEMS, load, coalesce=True)
+            for _ in range(5)
+        )
+    )
+    assert calls == [1]
+    assert results == [[Item(id=1)]] * 5
+    assert cache.stats()["coalesced"] == 4
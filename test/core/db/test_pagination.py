@@ -0,0 +1,43 @@
+from datetime import datetime
+
+import pytest
+
+from core.db.pagination import (
+    InvalidCursor,
+    decode_cursor,
+    decode_id_cursor,
+    encode_cursor,
+    next_cursor,
+)
+
+
+@pytest.mark.unittest
+def test_cursor_round_trip():
+    created_at = datetime(2024, 6, 5, 1, 48, 30, 925698)
+    cursor = encode_cursor(None, created_at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 3) == [None, created_at.isoformat(), 42]
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(1, 2)])
+def test_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, 3)
+
+
+@pytest.mark.unittest
+def test_id_cursor():
+    assert decode_id_cursor(encode_cursor(7)) == 7
+    with pytest.raises(InvalidCursor):
+        decode_id_cursor(encode_cursor("seven"))
+
+
+@pytest.mark.unittest
+def test_next_cursor_only_for_full_pages():
+    class Row:
+        def __init__(self, id):
+            self.id = id
+
+    assert next_cursor([Row(1), Row(2)], 3, "id") is None
+    assert decode_cursor(next_cursor([Row(1), Row(2)], 2, "id"), 1) == [2]
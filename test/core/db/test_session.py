@@ -0,0 +1,146 @@
+import importlib
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.todo.models import Todo
+from core.db.session import (
+    EngineType,
+    RoutingSession,
+    dispose_engines,
+    get_async_session,
+    get_routing_context,
+    reset_routing_context,
+    reset_session_context,
+    recent_writers,
+    session,
+    set_routing_context,
+    set_routing_user,
+    set_session_context,
+    warm_up_engines,
+)
+
+db_session = importlib.import_module("core.db.session")
+
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    replicas = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db")
+        for name in ("replica_1", "replica_2")
+    ]
+    monkeypatch.setattr(db_session, "reader_engines", replicas)
+    yield [engine.sync_engine for engine in replicas]
+
+
+@pytest.fixture
+def routing():
+    context = set_routing_context(use_primary=False)
+    yield get_routing_context()
+    reset_routing_context(context)
+
+
+@pytest.mark.unittest
+def test_reads_without_request_use_primary(replicas):
+    bind = RoutingSession().get_bind(clause=select(Todo))
+    assert bind is db_session.get_engine(EngineType.READER_WRITER).sync_engine
+
+
+@pytest.mark.unittest
+def test_reads_are_spread_over_replicas(replicas, routing):
+    session = RoutingSession()
+    binds = {session.get_bind(clause=select(Todo)) for _ in range(4)}
+    assert binds == set(replicas)
+
+
+@pytest.mark.unittest
+def test_reads_stick_to_primary_after_write(replicas, routing):
+    session = RoutingSession()
+    primary = db_session.get_engine(EngineType.READER_WRITER).sync_engine
+
+    assert session.get_bind(clause=insert(Todo)) is primary
+    assert routing.wrote is True
+    assert session.get_bind(clause=select(Todo)) is primary
+
+
+@pytest.mark.unittest
+def test_user_reads_stick_to_primary_across_requests(replicas):
+    session = RoutingSession()
+    primary = db_session.get_engine(EngineType.READER_WRITER).sync_engine
+    recent_writers.clear()
+
+    # No cookie comes back, the user who wrote is remembered instead
+    for user_id, clause in (("writer", insert(Todo)), ("reader", select(Todo))):
+        context = set_routing_context(use_primary=False)
+        set_routing_user(user_id)
+        session.get_bind(clause=clause)
+        reset_routing_context(context)
+
+    context = set_routing_context(use_primary=False)
+    try:
+        set_routing_user("writer")
+        assert session.get_bind(clause=select(Todo)) is primary
+        set_routing_user("reader")
+        assert session.get_bind(clause=select(Todo)) in replicas
+    finally:
+        reset_routing_context(context)
+        recent_writers.clear()
+
+
+@pytest.mark.unittest
+def test_reader_falls_back_to_primary(monkeypatch):
+    monkeypatch.setattr(db_session, "reader_engines", [])
+    assert db_session.get_engine(EngineType.READER) is db_session.get_engine(
+        EngineType.READER_WRITER
+    )
+
+
+@pytest.mark.unittest
+async def test_get_async_session_is_request_scoped():
+    context = set_session_context(session_id="request-scoped")
+    try:
+        dependency = get_async_session()
+        request_session = await anext(dependency)
+        assert request_session is session()
+        await dependency.aclose()
+    finally:
+        await session.remove()
+        reset_session_context(context)
+
+
+@pytest.mark.unittest
+async def test_engines_follow_the_lifespan():
+    await warm_up_engines(2)
+    assert EngineType.READER_WRITER in db_session.engines
+    await dispose_engines()
+    assert db_session.engines == {}
+
+
+@pytest.mark.unittest
+async def test_warm_up_survives_a_refused_connection(monkeypatch, caplog):
+    await dispose_engines()
+    db_session.init_engines()
+    engine = db_session.engines[EngineType.READER_WRITER]
+    opened, connect = [], type(engine).connect
+    calls = iter(range(3))
+
+    async def refused():
+        raise ConnectionRefusedError("down")
+
+    def flaky_connect(self):
+        if next(calls) == 1:
+            return refused()
+        connection = connect(self)
+        opened.append(connection)
+        return connection
+
+    monkeypatch.setattr(type(engine), "connect", flaky_connect)
+    try:
+        await warm_up_engines(3)
+        assert "Could not warm up 1 of 3 connections" in caplog.text
+        assert len(opened) == 2
+        assert all(connection.closed for connection in opened)
+    finally:
+        monkeypatch.undo()
+        await dispose_engines()
@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.contexts import database_query_stats
+from core.db.stats import QueryStats, fingerprint, instrument
+
+
+@pytest.mark.unittest
+def test_fingerprint_folds_parameters():
+    assert fingerprint("SELECT * FROM todo WHERE id IN (?, ?, ?)") == fingerprint(
+        "SELECT *\n FROM todo WHERE id IN ($1, $2)"
+    )
+    assert fingerprint("SELECT 1 FROM todo") != fingerprint("SELECT 1 FROM task")
+
+
+@pytest.mark.unittest
+async def test_statements_of_the_request_are_recorded(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    instrument(engine.sync_engine)
+    stats = QueryStats()
+    context = database_query_stats.set(stats)
+    try:
+        async with engine.connect() as connection:
+            for i in range(3):
+                await connection.execute(text("SELECT :value"), {"value": i})
+            await connection.execute(text("SELECT 1"))
+    finally:
+        database_query_stats.reset(context)
+        await engine.dispose()
+
+    assert stats.count == 4
+    assert stats.duration > 0
+    assert stats.repeated(3) == {"SELECT ?": 3}
+    assert stats.server_timing().endswith('desc="4 queries"')
+    assert stats.as_log(3)["db_repeated"].popitem()[1]["count"] == 3
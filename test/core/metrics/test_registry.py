@@ -0,0 +1,116 @@
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.metrics import Counter, Gauge, Histogram, Registry
+from core.metrics.registry import _started
+
+
+@pytest.mark.unittest
+def test_render_text_format():
+    registry = Registry()
+    requests = Counter("requests", "Requests", ("route",), registry=registry)
+    latency = Histogram(
+        "latency_seconds", "Latency", buckets=(0.1, 1), registry=registry
+    )
+    Gauge("queue", "Queued", callback=lambda: 3, registry=registry)
+    requests.inc(route='/a"b')
+    requests.inc(2, route='/a"b')
+    for value in (0.05, 0.5, 5):
+        latency.observe(value)
+
+    lines = registry.render().splitlines()
+    assert "# TYPE requests counter" in lines
+    assert 'requests_total{route="/a\\"b"} 3.0' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1.0' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2.0' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3.0' in lines
+    assert "latency_seconds_count 3.0" in lines
+    assert "queue 3.0" in lines
+
+
+@pytest.mark.unittest
+def test_labels_are_checked():
+    registry = Registry()
+    requests = Counter("requests", "Requests", ("route",), registry=registry)
+    with pytest.raises(ValueError):
+        requests.inc(method="GET")
+    with pytest.raises(ValueError):
+        Counter("requests", "Again", registry=registry)
+
+
+def snapshot(started, requests: float, wait: float) -> str:
+    return json.dumps(
+        {
+            "started": started,
+            "metrics": {
+                "requests": {
+                    "type": "counter",
+                    "help": "Requests",
+                    "aggregate": "sum",
+                    "samples": [["requests_total", {}, requests]],
+                },
+                "wait": {
+                    "type": "gauge",
+                    "help": "Wait",
+                    "aggregate": "max",
+                    "samples": [["wait", {}, wait]],
+                },
+            },
+        }
+    )
+
+
+@pytest.mark.unittest
+def test_snapshots_of_workers_are_aggregated(tmp_path):
+    registry = Registry()
+    registry.directory = tmp_path
+    Counter("requests", "Requests", registry=registry).inc(2)
+    Gauge("wait", "Wait", aggregate="max", registry=registry).set(1)
+
+    parent = os.getppid()
+    (tmp_path / f"{parent}-a.json").write_text(snapshot(_started(parent), 3, 4))
+    process = subprocess.Popen(["true"])
+    process.wait()
+    dead = tmp_path / f"{process.pid}-b.json"
+    dead.write_text(snapshot(None, 5, 9))
+    # A live pid, but not the process that wrote the snapshot
+    reused = tmp_path / f"{parent}-c.json"
+    reused.write_text(snapshot("another boot:0", 7, 9))
+
+    for _ in range(2):
+        # Stopped workers still count, their gauges are gone
+        lines = registry.render().splitlines()
+        assert "requests_total 17.0" in lines
+        assert "wait 4.0" in lines
+    assert not dead.exists() and not reused.exists()
+    assert registry.snapshot_path.exists()
+
+    registry.retire_snapshot()
+    assert not registry.snapshot_path.exists()
+    other = Registry()
+    other.directory = tmp_path
+    assert "requests_total 17.0" in other.render().splitlines()
+
+
+@pytest.mark.unittest
+def test_concurrent_snapshot_writes(tmp_path):
+    registry = Registry()
+    registry.directory = tmp_path
+    Counter("requests", "Requests", registry=registry).inc(2)
+    collected = registry.collect()
+    # Named before any writer, as start() does
+    registry.snapshot_path
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        writes = [
+            executor.submit(registry.write_snapshot, collected) for _ in range(50)
+        ]
+        for write in writes:
+            write.result()
+    assert [path.name for path in tmp_path.iterdir()] == [registry.snapshot_path.name]
+    assert json.loads(registry.snapshot_path.read_text())["metrics"] == json.loads(
+        json.dumps(collected)
+    )
@@ -0,0 +1,155 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from core.db.pool import TimedQueuePool
+from core.db.session import EngineType
+from core.middleware import load_shedding
+from core.middleware.load_shedding import LoadSheddingMiddleware
+
+db_session = importlib.import_module("core.db.session")
+
+
+def client(release: asyncio.Event, **options) -> AsyncClient:
+    async def slow(request):
+        await release.wait()
+        return PlainTextResponse("ok")
+
+    app = Starlette(
+        routes=[
+            Route("/{path:path}", slow),
+        ]
+    )
+    app.add_middleware(
+        LoadSheddingMiddleware,
+        critical_paths=["/health"],
+        low_priority_paths=["/sync"],
+        **options,
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.unittest
+async def test_requests_over_the_cap_are_shed_but_critical_ones_pass():
+    release = asyncio.Event()
+    async with client(release, max_in_flight=1, queue_timeout=0.05) as test_client:
+        running = asyncio.create_task(test_client.get("/todo/"))
+        await asyncio.sleep(0.01)
+
+        response = await test_client.get("/todo/")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+        release.set()
+        assert (await test_client.get("/health")).status_code == 200
+        assert (await running).status_code == 200
+
+
+@pytest.mark.unittest
+async def test_queued_requests_get_the_next_slot():
+    release = asyncio.Event()
+    async with client(release, max_in_flight=1, queue_timeout=1) as test_client:
+        responses = [asyncio.create_task(test_client.get("/todo/")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        release.set()
+        assert [(await r).status_code for r in responses] == [200] * 3
+
+
+@pytest.mark.unittest
+async def test_slot_handed_over_as_the_wait_times_out_is_kept(monkeypatch):
+    middleware = LoadSheddingMiddleware(None, max_in_flight=1, queue_timeout=1)
+    assert await middleware.acquire(load_shedding.Priority.NORMAL)
+
+    async def wait_for(waiter, timeout):
+        # The slot is released and the timeout fires in the same tick
+        middleware.release()
+        raise asyncio.TimeoutError
+
+    monkeypatch.setattr(load_shedding.asyncio, "wait_for", wait_for)
+    assert await middleware.acquire(load_shedding.Priority.NORMAL)
+    assert middleware.in_flight == 1
+    middleware.release()
+    assert middleware.in_flight == 0
+
+
+@pytest.mark.unittest
+async def test_pool_pressure_sheds_by_priority(monkeypatch):
+    release = asyncio.Event()
+    release.set()
+    primary = SimpleNamespace(oldest_wait=lambda: 0.0, exhausted=lambda: False)
+    replica = SimpleNamespace(oldest_wait=lambda: 0.0, exhausted=lambda: True)
+    monkeypatch.setattr(load_shedding, "routed_pools", lambda: [primary, replica])
+    async with client(release, max_pool_wait=0.5) as test_client:
+        # The replica is exhausted but keeping up, only low priority is turned away
+        assert (await test_client.get("/sync")).status_code == 503
+        assert (await test_client.get("/todo/")).status_code == 200
+
+        replica.oldest_wait = lambda: 1.0
+        assert (await test_client.get("/todo/")).status_code == 503
+        assert (await test_client.get("/health")).status_code == 200
+
+
+@pytest.mark.unittest
+async def test_routed_pools_are_the_primary_and_the_least_busy_replica(
+    tmp_path, monkeypatch
+):
+    def engine(name: str):
+        return create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / name}",
+            poolclass=TimedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+
+    primary, busy, idle = engine("primary.db"), engine("busy.db"), engine("idle.db")
+    monkeypatch.setitem(db_session.engines, EngineType.READER_WRITER, primary)
+    monkeypatch.setattr(db_session, "reader_engines", [busy, idle])
+    connection = await busy.connect()
+    try:
+        rotation = next(db_session._reader_rotation)
+        # Reads skip the replica with every connection out, so does shedding
+        assert load_shedding.routed_pools() == [
+            primary.sync_engine.pool,
+            idle.sync_engine.pool,
+        ]
+        # Without taking a turn of the round-robin of the queries
+        assert next(db_session._reader_rotation) == rotation + 1
+    finally:
+        await connection.close()
+        for each in (primary, busy, idle):
+            await each.dispose()
+
+
+@pytest.mark.unittest
+async def test_timed_pool_tracks_waiting_checkouts(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    pool = engine.sync_engine.pool
+
+    async def connect():
+        return await engine.connect()
+
+    first = await connect()
+    second = asyncio.create_task(connect())
+    await asyncio.sleep(0.05)
+    assert pool.waiting() == 1
+    assert pool.oldest_wait() >= 0.04
+    assert pool.checkedout() == pool.capacity == 1
+
+    await first.close()
+    await (await second).close()
+    assert pool.waiting() == 0
+    assert pool.oldest_wait() == 0.0
+    await engine.dispose()
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core.conditional import NotModified, check_etag, etag_matches, make_etag
+
+
+def make_request(if_none_match=None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+@pytest.mark.unittest
+def test_etag_depends_on_every_part():
+    updated_at = datetime(2024, 6, 5, 4, 11, 39)
+    assert make_etag("todos", 1, updated_at) == make_etag("todos", 1, updated_at)
+    assert make_etag("todos", 1, updated_at) != make_etag("todos", 2, updated_at)
+    assert make_etag("todos", 1, updated_at).startswith('W/"')
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize(
+    "header, matches",
+    [
+        (None, False),
+        ('W/"a"', True),
+        ('"a"', True),
+        ('"b", W/"a"', True),
+        ("*", False),
+        ('W/"b"', False),
+    ],
+)
+def test_etag_matches(header, matches):
+    assert etag_matches(make_request(header), 'W/"a"') is matches
+
+
+@pytest.mark.unittest
+def test_check_etag():
+    response = Response()
+    check_etag(make_request(), response, 'W/"a"')
+    assert response.headers["ETag"] == 'W/"a"'
+
+    with pytest.raises(NotModified) as info:
+        check_etag(make_request('W/"a"'), Response(), 'W/"a"')
+    assert info.value.headers == {"ETag": 'W/"a"'}
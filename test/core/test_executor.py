@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from core.exception.handlers import executor_saturated_handler
+from core.executor import BoundedExecutor, ExecutorSaturated
+
+
+@pytest.mark.unittest
+async def test_run_off_the_event_loop():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=1)
+    thread = await executor.run(threading.current_thread)
+    assert thread is not threading.current_thread()
+    assert executor.pending == 0
+
+
+@pytest.mark.unittest
+async def test_saturated_executor_fails_fast():
+    executor = BoundedExecutor("test", max_workers=1, max_pending=1)
+    release = threading.Event()
+    running = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorSaturated):
+        await executor.run(len, "x")
+
+    release.set()
+    assert await running is True
+
+
+@pytest.mark.unittest
+def test_saturated_executor_returns_503():
+    app = FastAPI()
+    app.add_exception_handler(ExecutorSaturated, executor_saturated_handler)
+
+    @app.get("/")
+    async def saturated():
+        raise ExecutorSaturated("test", retry_after=2)
+
+    response = TestClient(app).get("/")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.db.pool import TimedQueuePool
+from core.health import Readiness
+
+
+@pytest.fixture
+async def engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'health.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.unittest
+async def test_ready_and_cached(engine):
+    readiness = Readiness(
+        lambda: engine, timeout=1, ttl=60, max_pool_wait=1, max_pool_waiting=10
+    )
+    ready, report = await readiness.check()
+    assert ready
+    assert report["database"]["status"] == "ok"
+    assert report["pool"]["capacity"] == 1
+
+    # Served from the cache, even though the pool is exhausted by now
+    connection = await engine.connect()
+    assert await readiness.check() == (ready, report)
+    await connection.close()
+
+
+@pytest.mark.unittest
+async def test_backed_up_pool_is_not_ready(engine):
+    readiness = Readiness(
+        lambda: engine, timeout=1, ttl=0, max_pool_wait=0.05, max_pool_waiting=10
+    )
+    connection = await engine.connect()
+    # Every connection out but nothing waiting, the pool keeps up
+    ready, report = await readiness.check()
+    assert ready
+    assert report["database"] == {"status": "busy"}
+    assert report["pool"]["saturation"] == 1
+
+    async def connect():
+        return await engine.connect()
+
+    waiting = asyncio.create_task(connect())
+    await asyncio.sleep(0.1)
+    ready, report = await readiness.check()
+    assert not ready
+    assert report["database"] == {"status": "pool saturated"}
+    assert report["pool"]["waiting"] == 1
+
+    await connection.close()
+    await (await waiting).close()
+    assert (await readiness.check())[0]
+
+
+@pytest.mark.unittest
+async def test_queued_pool_is_not_ready(engine):
+    readiness = Readiness(
+        lambda: engine, timeout=1, ttl=0, max_pool_wait=60, max_pool_waiting=1
+    )
+    connection = await engine.connect()
+
+    async def connect():
+        return await engine.connect()
+
+    waiting = [asyncio.create_task(connect())]
+    await asyncio.sleep(0.01)
+    # One checkout queued for a moment, the pool keeps up
+    assert (await readiness.check())[1]["database"] == {"status": "busy"}
+    waiting.append(asyncio.create_task(connect()))
+    await asyncio.sleep(0.01)
+    ready, report = await readiness.check()
+    assert not ready
+    assert report["database"] == {"status": "pool saturated"}
+
+    await connection.close()
+    for task in waiting:
+        await (await task).close()
+
+
+@pytest.mark.unittest
+async def test_unlimited_pool_has_no_capacity(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'unlimited.db'}",
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=-1,
+    )
+    pool = engine.sync_engine.pool
+    connections = [await engine.connect() for _ in range(3)]
+    assert pool.capacity is None
+    assert not pool.exhausted()
+    assert pool.status()["saturation"] is None
+    for connection in connections:
+        await connection.close()
+    await engine.dispose()
+
+
+@pytest.mark.unittest
+async def test_unreachable_database_is_not_ready(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'x.db'}")
+    readiness = Readiness(
+        lambda: engine, timeout=1, ttl=0, max_pool_wait=1, max_pool_waiting=10
+    )
+    ready, report = await readiness.check()
+    assert not ready
+    assert report["database"] == {"status": "unavailable", "error": "OperationalError"}
+    await engine.dispose()
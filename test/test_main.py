@@ -1,11 +1,37 @@
+import pytest
 from fastapi.testclient import TestClient
 
 from main import app
 
-client = TestClient(app)
 
+@pytest.fixture
+def client():
+    with TestClient(app) as client:
+        yield client
 
-def test_project_root():
+
+def test_project_root(client):
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"message": "Welcome to the Game 🎮!"}
+
+
+def test_metrics(client):
+    client.get("/health")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_requests_total{method="GET",route="/health",status="200"}'
+        in response.text
+    )
+    assert "# TYPE db_statement_duration_seconds histogram" in response.text
+    assert "password_hash_pending " in response.text
+
+
+def test_liveness_and_readiness(client):
+    assert client.get("/health/live").json() == {"status": "alive"}
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+    assert response.json()["database"]["status"] == "ok"
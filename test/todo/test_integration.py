@@ -0,0 +1,770 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from faker import Faker
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.todo.models import Tombstone
+from app.todo.pruning import TombstonePruner
+from core.db import session_factory
+from core.db.pagination import decode_cursor, encode_cursor
+from core.settings.config import settings
+
+faker = Faker()
+
+
+@pytest.fixture
+def test_client():
+    from main import app
+
+    # Runs the lifespan, the pools then live on the client's event loop
+    with TestClient(app) as client:
+        yield client
+
+
+def register_and_login(test_client, email=None):
+    user_data = {
+        "username": faker.user_name() + faker.pystr(max_chars=6),
+        "password": faker.password(),
+        "email": email or faker.unique.email(),
+    }
+    test_client.post("/user/register", json=user_data)
+    response = test_client.post(
+        "/user/login",
+        data={"username": user_data["username"], "password": user_data["password"]},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def auth_headers(test_client):
+    return register_and_login(test_client)
+
+
+async def test_get_todos_cursor_pagination(test_client, auth_headers):
+    created = [
+        test_client.post(
+            "/todo/",
+            json={"title": faker.sentence(), "description": faker.paragraph()},
+            headers=auth_headers,
+        ).json()["id"]
+        for _ in range(5)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = test_client.get("/todo/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        seen += [todo["id"] for todo in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == created
+
+
+async def test_get_tasks_cursor_pagination(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    created = test_client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {
+                    "title": faker.sentence(),
+                    "description": faker.paragraph(),
+                    "todo_id": todo["id"],
+                    "priority": priority,
+                }
+                for priority in (2, None, 1, 1, None)
+            ]
+        },
+        headers=auth_headers,
+    ).json()
+
+    seen, params = [], {"todo_id": todo["id"], "limit": 2}
+    while True:
+        response = test_client.get("/task/", params=params, headers=auth_headers)
+        seen += [task["id"] for task in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    ids = [task["id"] for task in created]
+    assert seen == [ids[2], ids[3], ids[0], ids[1], ids[4]]
+
+
+async def test_get_todos_invalid_cursor(test_client, auth_headers):
+    response = test_client.get(
+        "/todo/", params={"cursor": "invalid"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "path, params",
+    [
+        ("/task/", {"cursor": encode_cursor("high", "yesterday", 1)}),
+        ("/sync", {"since": encode_cursor(*"x" * 9)}),
+    ],
+)
+async def test_invalid_keyset_cursor(test_client, auth_headers, path, params):
+    response = test_client.get(path, params=params, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+async def test_create_todo_and_task(test_client, auth_headers):
+    response = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    todo = response.json()
+    assert todo["id"] is not None
+    assert todo["created_at"] is not None
+
+    response = test_client.post(
+        "/task/",
+        json={
+            "title": faker.sentence(),
+            "description": faker.paragraph(),
+            "todo_id": todo["id"],
+            "priority": 1,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    task = response.json()
+    assert task["todo_id"] == todo["id"]
+    assert task["completed"] is False
+
+
+async def test_partial_update_todo(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+
+    response = test_client.patch(
+        f"/todo/{todo['id']}", json={"title": "renamed"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "renamed"
+    assert response.json()["description"] == todo["description"]
+
+    response = test_client.patch(
+        "/todo/0", json={"title": "renamed"}, headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+async def test_create_tasks_in_bulk(test_client, auth_headers):
+    todo_ids = [
+        test_client.post(
+            "/todo/",
+            json={"title": faker.sentence(), "description": faker.paragraph()},
+            headers=auth_headers,
+        ).json()["id"]
+        for _ in range(2)
+    ]
+    tasks = [
+        {
+            "title": f"task {index}",
+            "description": faker.paragraph(),
+            "todo_id": todo_ids[index % 2],
+            "priority": index,
+        }
+        for index in range(5)
+    ]
+
+    response = test_client.post(
+        "/task/bulk", json={"tasks": tasks}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    created = response.json()
+    assert [task["title"] for task in created] == [task["title"] for task in tasks]
+    assert [task["todo_id"] for task in created] == [task["todo_id"] for task in tasks]
+
+    tasks[0]["todo_id"] = 0
+    response = test_client.post(
+        "/task/bulk", json={"tasks": tasks}, headers=auth_headers
+    )
+    assert response.status_code == 404
+
+
+async def test_bulk_update_tasks(test_client, auth_headers):
+    todo_ids = [
+        test_client.post(
+            "/todo/",
+            json={"title": faker.sentence(), "description": faker.paragraph()},
+            headers=auth_headers,
+        ).json()["id"]
+        for _ in range(2)
+    ]
+    tasks = test_client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {
+                    "title": f"task {index}",
+                    "description": faker.paragraph(),
+                    "todo_id": todo_ids[0],
+                    "priority": index,
+                }
+                for index in range(3)
+            ]
+        },
+        headers=auth_headers,
+    ).json()
+
+    response = test_client.patch(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {"id": tasks[0]["id"], "completed": True},
+                {"id": tasks[1]["id"], "todo_id": todo_ids[1], "title": "moved"},
+                {"id": 0, "completed": True},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    result = response.json()
+    assert result["updated"] == 2
+    assert result["not_found"] == [0]
+    updated = {task["id"]: task for task in result["tasks"]}
+    assert updated[tasks[0]["id"]]["completed"] is True
+    assert updated[tasks[1]["id"]]["todo_id"] == todo_ids[1]
+    assert updated[tasks[1]["id"]]["title"] == "moved"
+
+    response = test_client.patch(
+        "/task/bulk",
+        json={
+            "filter": {"todo_id": todo_ids[0], "completed": False},
+            "values": {"completed": True},
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+
+    response = test_client.patch(
+        "/task/bulk",
+        json={"filter": {"todo_id": todo_ids[0]}, "values": {"todo_id": 0}},
+        headers=auth_headers,
+    )
+    assert response.status_code == 404
+
+    for body in (
+        {"tasks": [{"id": tasks[2]["id"]}], "values": {"todo_id": todo_ids[1]}},
+        {"tasks": [{"id": tasks[2]["id"], "todo_id": None}]},
+        {"filter": {"todo_id": todo_ids[0]}, "values": {"todo_id": None}},
+    ):
+        response = test_client.patch("/task/bulk", json=body, headers=auth_headers)
+        assert response.status_code == 422
+    task = test_client.get(f"/task/{tasks[2]['id']}", headers=auth_headers).json()
+    assert task["todo_id"] == todo_ids[0]
+
+    response = test_client.patch("/task/bulk", json={}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+async def test_share_todo_in_bulk(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    emails = [faker.unique.email() for _ in range(2)]
+    for email in emails:
+        test_client.post(
+            "/user/register",
+            json={
+                "email": email,
+                "password": faker.password(),
+                "username": faker.user_name() + faker.pystr(max_chars=6),
+            },
+        )
+    unknown = faker.unique.email()
+
+    path = f"/todo/{todo['id']}/share/bulk/"
+    response = test_client.post(
+        path, json={"emails": [*emails, unknown]}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "shared": emails,
+        "already_shared": [],
+        "unknown": [unknown],
+    }
+
+    local, domain = emails[0].split("@")
+    mixed_case = f"{local.upper()}@{domain}"
+    response = test_client.post(
+        path, json={"emails": [mixed_case]}, headers=auth_headers
+    )
+    assert response.json() == {
+        "shared": [],
+        "already_shared": [mixed_case],
+        "unknown": [],
+    }
+
+
+async def test_shared_todo_tasks_are_scoped_to_the_recipient(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    test_client.post(
+        "/task/",
+        json={
+            "title": faker.sentence(),
+            "description": faker.paragraph(),
+            "todo_id": todo["id"],
+            "priority": 1,
+        },
+        headers=auth_headers,
+    )
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    stranger_headers = register_and_login(test_client)
+    test_client.post(
+        f"/todo/{todo['id']}/share/", json={"email": email}, headers=auth_headers
+    )
+
+    path = f"/shared-todo/{todo['id']}/tasks"
+    response = test_client.get(path, headers=recipient_headers)
+    assert response.status_code == 200
+    assert [task["todo_id"] for task in response.json()] == [todo["id"]]
+
+    response = test_client.get(path, headers=stranger_headers)
+    assert response.status_code == 404
+
+
+async def test_search_owned_and_shared(test_client, auth_headers):
+    word = faker.pystr(min_chars=12, max_chars=12).lower()
+    todo = test_client.post(
+        "/todo/",
+        json={"title": f"groceries {word}", "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    test_client.post(
+        "/task/",
+        json={
+            "title": faker.sentence(),
+            "description": f"buy {word} and milk",
+            "todo_id": todo["id"],
+            "priority": None,
+        },
+        headers=auth_headers,
+    )
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    stranger_headers = register_and_login(test_client)
+
+    response = test_client.get(f"/search?q={word}", headers=auth_headers)
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["todos"]] == [todo["id"]]
+    assert [item["todo_id"] for item in response.json()["tasks"]] == [todo["id"]]
+
+    response = test_client.get(f"/search?q={word}", headers=recipient_headers)
+    assert response.json() == {"todos": [], "tasks": []}
+    test_client.post(
+        f"/todo/{todo['id']}/share/", json={"email": email}, headers=auth_headers
+    )
+    response = test_client.get(f"/search?q={word} milk", headers=recipient_headers)
+    assert len(response.json()["tasks"]) == 1
+
+    response = test_client.get(f"/search?q={word}", headers=stranger_headers)
+    assert response.json() == {"todos": [], "tasks": []}
+
+
+async def test_filter_tasks(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    tasks = test_client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {
+                    "title": faker.sentence(),
+                    "description": faker.paragraph(),
+                    "todo_id": todo["id"],
+                    "priority": priority,
+                }
+                for priority in (1, 2, 3, 4)
+            ]
+        },
+        headers=auth_headers,
+    ).json()
+    test_client.patch(
+        f"/task/{tasks[0]['id']}", json={"completed": True}, headers=auth_headers
+    )
+
+    response = test_client.get(
+        "/task/",
+        params={"todo_id": todo["id"], "completed": False},
+        headers=auth_headers,
+    )
+    assert [task["priority"] for task in response.json()] == [2, 3, 4]
+
+    response = test_client.get(
+        "/task/",
+        params={"todo_id": todo["id"], "priority_min": 2, "priority_max": 3},
+        headers=auth_headers,
+    )
+    assert [task["priority"] for task in response.json()] == [2, 3]
+
+    response = test_client.get(
+        "/task/",
+        params={"todo_id": todo["id"], "created_before": "2000-01-01T00:00:00"},
+        headers=auth_headers,
+    )
+    assert response.json() == []
+
+
+async def test_sync_deltas(test_client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "sync_page_size", 2)
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    tasks = test_client.post(
+        "/task/bulk",
+        json={
+            "tasks": [
+                {
+                    "title": faker.sentence(),
+                    "description": faker.paragraph(),
+                    "todo_id": todo["id"],
+                    "priority": None,
+                }
+                for _ in range(3)
+            ]
+        },
+        headers=auth_headers,
+    ).json()
+    test_client.delete(f"/task/{tasks[0]['id']}", headers=auth_headers)
+
+    response = test_client.get("/sync", headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["todos"]] == [todo["id"]]
+    assert [item["id"] for item in body["tasks"]] == [tasks[1]["id"], tasks[2]["id"]]
+    assert [(item["entity"], item["entity_id"]) for item in body["deleted"]] == [
+        ("task", tasks[0]["id"])
+    ]
+    assert body["has_more"] is True
+
+    body = test_client.get(
+        "/sync", params={"since": body["cursor"]}, headers=auth_headers
+    ).json()
+    assert body["tasks"] == [] and body["todos"] == [] and body["has_more"] is False
+
+    test_client.patch(
+        f"/task/{tasks[2]['id']}", json={"completed": True}, headers=auth_headers
+    )
+    body = test_client.get(
+        "/sync", params={"since": body["cursor"]}, headers=auth_headers
+    ).json()
+    assert [item["id"] for item in body["tasks"]] == [tasks[2]["id"]]
+    assert body["deleted"] == []
+
+    response = test_client.get("/sync", params={"since": "x"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+async def test_sync_resends_shared_todos_edited_by_the_owner(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    test_client.post(
+        f"/todo/{todo['id']}/share/", json={"email": email}, headers=auth_headers
+    )
+    body = test_client.get("/sync", headers=recipient_headers).json()
+    assert [item["todo_id"] for item in body["shared_todos"]] == [todo["id"]]
+
+    title = faker.sentence()
+    test_client.patch(
+        f"/todo/{todo['id']}", json={"title": title}, headers=auth_headers
+    )
+    body = test_client.get(
+        "/sync", params={"since": body["cursor"]}, headers=recipient_headers
+    ).json()
+    assert [item["todo"]["title"] for item in body["shared_todos"]] == [title]
+
+
+async def test_sync_cursor_expires_with_the_tombstones(test_client, auth_headers):
+    cursor = test_client.get("/sync", headers=auth_headers).json()["cursor"]
+    *keysets, caught_up_at = decode_cursor(cursor, 9)
+    retention = settings.sync_tombstone_retention_days * 24 * 60 * 60
+    expired = encode_cursor(*keysets, caught_up_at - retention - 60)
+
+    response = test_client.get("/sync", params={"since": expired}, headers=auth_headers)
+    assert response.status_code == 410
+    assert response.json()["detail"] == "Cursor expired, full resync required"
+
+
+def test_prune_tombstones(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    test_client.delete(f"/todo/{todo['id']}", headers=auth_headers)
+
+    async def expire_tombstone():
+        async with session_factory() as session:
+            await session.execute(
+                update(Tombstone)
+                .where(Tombstone.entity_id == todo["id"])
+                .values(created_at=datetime(2000, 1, 1))
+            )
+            await session.commit()
+
+    # The pools belong to the client's event loop, not to the test's
+    test_client.portal.call(expire_tombstone)
+    pruner = TombstonePruner(timedelta(days=1), batch_size=1)
+    assert test_client.portal.call(pruner.prune) >= 1
+    deleted = test_client.get("/sync", headers=auth_headers).json()["deleted"]
+    assert ("todo", todo["id"]) not in [
+        (item["entity"], item["entity_id"]) for item in deleted
+    ]
+
+
+async def test_sync_batch(test_client, auth_headers):
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    task = {"title": faker.sentence(), "description": faker.paragraph()}
+    operations = [
+        {
+            "op": "create",
+            "entity": "todo",
+            "temp_id": "todo-1",
+            "values": {"title": faker.sentence(), "description": faker.paragraph()},
+        },
+        {
+            "op": "create",
+            "entity": "task",
+            "temp_id": "task-1",
+            "values": {**task, "todo_id": "todo-1", "priority": 1},
+        },
+        {
+            "op": "update",
+            "entity": "task",
+            "id": "task-1",
+            "values": {"completed": True},
+            "updated_at": "2100-01-01T00:00:00Z",
+        },
+        {
+            "op": "update",
+            "entity": "task",
+            "id": "task-1",
+            "values": {"completed": False},
+            "updated_at": "2000-01-01T00:00:00Z",
+        },
+        {
+            "op": "create",
+            "entity": "share",
+            "values": {"todo_id": "todo-1", "email": email},
+        },
+        {"op": "delete", "entity": "task", "id": 2**31 - 1},
+        {"op": "create", "entity": "task", "values": {"todo_id": "todo-1"}},
+        {"op": "delete", "entity": "todo", "id": "missing"},
+        {
+            "op": "create",
+            "entity": "task",
+            "values": {**task, "todo_id": "todo-1", "priority": 2**40},
+        },
+    ]
+    response = test_client.post(
+        "/sync/batch", json={"operations": operations}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["status_code"] for result in body["results"]] == [
+        201,
+        201,
+        200,
+        409,
+        201,
+        404,
+        422,
+        404,
+        422,
+    ]
+    todo_id, task_id = body["id_map"]["todo-1"], body["id_map"]["task-1"]
+    assert body["results"][1]["id"] == task_id
+
+    response = test_client.get(f"/task/{task_id}", headers=auth_headers)
+    assert response.json()["completed"] is True
+    assert response.json()["todo_id"] == todo_id
+    response = test_client.get(
+        f"/shared-todo/{todo_id}/tasks", headers=recipient_headers
+    )
+    assert [item["id"] for item in response.json()] == [task_id]
+
+
+async def test_conditional_get(test_client, auth_headers):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    response = test_client.get("/todo/", headers=auth_headers)
+    etag = response.headers["ETag"]
+
+    response = test_client.get(
+        "/todo/", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    # Another page is another representation
+    response = test_client.get(
+        "/todo/", params={"limit": 1}, headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+    test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    )
+    response = test_client.get(
+        "/todo/", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    task = test_client.post(
+        "/task/",
+        json={
+            "title": faker.sentence(),
+            "description": faker.paragraph(),
+            "todo_id": todo["id"],
+            "priority": None,
+        },
+        headers=auth_headers,
+    ).json()
+    etag = test_client.get(f"/task/{task['id']}", headers=auth_headers).headers["ETag"]
+    response = test_client.get(
+        f"/task/{task['id']}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    # Not answered before the task is looked up, it might not exist
+    response = test_client.get(
+        f"/task/{task['id']}", headers={**auth_headers, "If-None-Match": "*"}
+    )
+    assert response.status_code == 200
+    etag = test_client.get("/task/", headers=auth_headers).headers["ETag"]
+    response = test_client.get(
+        "/task/", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    response = test_client.get(
+        "/task/",
+        params={"completed": True},
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+
+
+async def test_list_cache_is_invalidated_per_user(test_client, auth_headers):
+    from app.todo.cache import response_cache
+
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    assert test_client.get("/shared-todo/", headers=recipient_headers).json() == []
+
+    hits = response_cache.hits
+    assert test_client.get("/todo/", headers=auth_headers).json() == [todo]
+    assert test_client.get("/todo/", headers=auth_headers).json() == [todo]
+    assert response_cache.hits == hits + 1
+
+    test_client.post(
+        f"/todo/{todo['id']}/share/", json={"email": email}, headers=auth_headers
+    )
+    shared = test_client.get("/shared-todo/", headers=recipient_headers).json()
+    assert [item["todo_id"] for item in shared] == [todo["id"]]
+
+    title = faker.sentence()
+    test_client.patch(
+        f"/todo/{todo['id']}", json={"title": title}, headers=auth_headers
+    )
+    assert test_client.get("/todo/", headers=auth_headers).json()[0]["title"] == title
+    shared = test_client.get("/shared-todo/", headers=recipient_headers).json()
+    assert shared[0]["todo"]["title"] == title
+
+    response = test_client.get("/health/cache")
+    assert response.json()["response"]["hits"] >= hits + 1
+
+
+async def test_invalidated_users_read_from_the_primary():
+    from app.todo.cache import evict_listings
+    from core.cache.bus import InvalidationEvent
+    from core.db.session import recent_writers
+
+    recipient = str(uuid.uuid4())
+    assert not recent_writers.get(recipient)
+    # Published by another worker after its write committed, e.g. a share
+    await evict_listings(InvalidationEvent("shared_todo", 1, (recipient,)))
+    assert recent_writers.get(recipient)
+
+
+async def test_list_query_counts(test_client, auth_headers, assert_max_queries):
+    todo = test_client.post(
+        "/todo/",
+        json={"title": faker.sentence(), "description": faker.paragraph()},
+        headers=auth_headers,
+    ).json()
+    email = faker.unique.email()
+    recipient_headers = register_and_login(test_client, email)
+    for _ in range(3):
+        test_client.post(
+            "/task/",
+            json={
+                "title": faker.sentence(),
+                "description": faker.paragraph(),
+                "todo_id": todo["id"],
+                "priority": 1,
+            },
+            headers=auth_headers,
+        )
+    test_client.post(
+        f"/todo/{todo['id']}/share/", json={"email": email}, headers=auth_headers
+    )
+
+    # The user and the page, whatever the page size. The cache version the
+    # ETag is built on is read from memory, it costs no query.
+    with assert_max_queries(2):
+        response = test_client.get("/todo/", headers=auth_headers)
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    with assert_max_queries(2):
+        test_client.get("/task/", headers=auth_headers)
+    with assert_max_queries(2):
+        test_client.get("/shared-todo/", headers=recipient_headers)
+    with assert_max_queries(2):
+        test_client.get(f"/shared-todo/{todo['id']}/tasks", headers=recipient_headers)
@@ -0,0 +1,280 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.todo.models import SharedTodo, Task, Todo
+from app.todo.repositories.search import SearchRepository
+from app.todo.repositories.shared_todo import SharedTodoRepository
+from app.todo.repositories.sync import SyncRepository
+from app.todo.repositories.task import TaskRepository
+from app.todo.repositories.todo import TodoRepository
+from app.user.models.user import User
+from core.db import BaseModel
+from core.settings.config import settings
+
+USERS = 20
+TODOS_PER_USER = 10
+TASKS_PER_TODO = 20
+PLANNED_TABLES = {"task", "todo", "shared_todo"}
+
+pytestmark = pytest.mark.skipif(
+    make_url(settings.database_url).get_backend_name() != "postgresql",
+    reason="query plans are only checked against PostgreSQL",
+)
+
+
+@pytest.fixture
+async def connection():
+    """
+    A connection to a seeded copy of the schema, everything happens in a
+    scratch schema inside one transaction that is rolled back at the end.
+    """
+    engine = create_async_engine(settings.database_url)
+    try:
+        connection = await engine.connect()
+    except (OSError, ConnectionError) as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+    transaction = await connection.begin()
+    try:
+        await connection.execute(text("CREATE SCHEMA query_plans"))
+        await connection.execute(text("SET LOCAL search_path TO query_plans"))
+        await connection.run_sync(BaseModel.metadata.create_all)
+        await seed(connection)
+        await connection.execute(text("ANALYZE"))
+        # Any usable index wins over a disabled seq scan, so a seq scan in the
+        # plan means no index fits the query, whatever the table size
+        await connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+    finally:
+        await transaction.rollback()
+        await connection.close()
+        await engine.dispose()
+
+
+async def seed(connection) -> None:
+    now = datetime.now()
+    # Rows keep the change_seq given below, as if committed one by one long ago
+    await connection.execute(text("SET LOCAL session_replication_role = replica"))
+    users = [
+        {
+            "id": uuid.uuid4(),
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "hashed_password": "x",
+        }
+        for i in range(USERS)
+    ]
+    await connection.execute(insert(User), users)
+    todos = [
+        {
+            "id": i * TODOS_PER_USER + j + 1,
+            "owner_id": user["id"],
+            "title": "todo",
+            "change_seq": i * TODOS_PER_USER + j + 1,
+        }
+        for i, user in enumerate(users)
+        for j in range(TODOS_PER_USER)
+    ]
+    await connection.execute(insert(Todo), todos)
+    tasks = [
+        {
+            "todo_id": todo["id"],
+            "owner_id": todo["owner_id"],
+            "title": f"task {k}",
+            "priority": k % 5 or None,
+            "completed": k % 3 == 0,
+            "created_at": now - timedelta(minutes=k),
+            "change_seq": todo["id"] * TASKS_PER_TODO + k,
+        }
+        for todo in todos
+        for k in range(TASKS_PER_TODO)
+    ]
+    await connection.execute(insert(Task), tasks)
+    shared = [
+        {
+            "user_id": user["id"],
+            "todo_id": todos[(i + 1) * TODOS_PER_USER % len(todos)]["id"],
+            "change_seq": i + 1,
+        }
+        for i, user in enumerate(users)
+    ]
+    await connection.execute(insert(SharedTodo), shared)
+    # What the search_vector triggers, off for the seeding, would have filled
+    for table in ("todo", "task"):
+        await connection.execute(
+            text(
+                f"UPDATE {table} SET search_vector = to_tsvector("
+                "'english', coalesce(title, '') || ' ' || coalesce(description, ''))"
+            )
+        )
+    await connection.execute(text("SET LOCAL session_replication_role = DEFAULT"))
+
+
+def nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from nodes(child)
+
+
+def scans(plan: dict):
+    if plan.get("Relation Name") in PLANNED_TABLES:
+        yield plan
+    for child in plan.get("Plans", []):
+        yield from scans(child)
+
+
+async def explain(connection, statement, parameters, analyze=False) -> dict:
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = await connection.exec_driver_sql(
+        f"EXPLAIN ({options}) {statement}", parameters
+    )
+    plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]["Plan"]
+
+
+async def assert_uses_indexes(connection, statements) -> None:
+    assert statements
+    for statement, parameters in statements:
+        for node in scans(await explain(connection, statement, parameters)):
+            # A full index scan has no condition and is a seq scan in disguise
+            assert node["Node Type"] != "Seq Scan", statement
+            assert "Index Cond" in node or "Recheck Cond" in node, statement
+
+
+async def assert_seeks_to_cursor(connection, statements) -> None:
+    """
+    Keyset pages start reading at their cursor, an index scan throwing away
+    the rows before it would still pass `assert_uses_indexes`.
+    """
+    assert statements
+    for statement, parameters in statements:
+        plan = await explain(connection, statement, parameters, analyze=True)
+        for node in scans(plan):
+            # Only a filter removing nothing, e.g. the owner of a todo, is fine
+            assert not node.get("Rows Removed by Filter"), (statement, node)
+            assert not node.get("Rows Removed by Index Recheck"), (statement, node)
+
+
+@pytest.fixture
+async def repository_statements(connection):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(connection.sync_connection, "before_cursor_execute", record)
+    session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+    yield session, statements
+    event.remove(connection.sync_connection, "before_cursor_execute", record)
+    await session.close()
+
+
+async def owner(connection):
+    return await connection.scalar(text("SELECT owner_id FROM todo WHERE id = 1"))
+
+
+async def test_todo_queries_use_indexes(connection, repository_statements):
+    session, statements = repository_statements
+    repository = TodoRepository(session)
+    user_id = await owner(connection)
+    await repository.get_todos(user_id, 0, 10)
+    await repository.get_todos(user_id, 0, 10, after=3)
+    keyset = statements[-1:]
+    await repository.get_todo_by_id(1, user_id)
+    await repository.get_owned_todo_ids({1, 2, 3}, user_id)
+    await assert_uses_indexes(connection, statements)
+    await assert_seeks_to_cursor(connection, keyset)
+
+
+async def test_task_queries_use_indexes(connection, repository_statements):
+    session, statements = repository_statements
+    repository = TaskRepository(session)
+    user_id = await owner(connection)
+    await repository.get_tasks(user_id, 0, 10)
+    await repository.get_tasks(user_id, 0, 10, todo_id=1)
+    await repository.get_tasks(user_id, 0, 10, after=(1, datetime.now(), 5))
+    keyset = statements[-1:]
+    await repository.get_tasks(
+        user_id, 0, 10, filters={"priority_min": 2, "created_after": datetime.now()}
+    )
+    await repository.get_task_by_id(1, user_id)
+    await repository.get_shared_tasks(user_id, 1, 0, 10)
+    await assert_uses_indexes(connection, statements)
+    await assert_seeks_to_cursor(connection, keyset)
+
+
+async def test_task_cursor_bounds_the_index_scan(connection, repository_statements):
+    session, statements = repository_statements
+    repository = TaskRepository(session)
+    user_id = await owner(connection)
+    statements.clear()
+    for priority in (1, None):
+        await repository.get_tasks(user_id, 0, 10, after=(priority, datetime.now(), 5))
+        await repository.get_tasks(
+            user_id, 0, 10, after=(priority, datetime.now(), 5), todo_id=1
+        )
+    for statement, parameters in statements:
+        plan = await explain(connection, statement, parameters)
+        # Deep pages cost the same as the first one, the cursor bounds the
+        # index range and no row before it is read then thrown away
+        assert any(
+            "created_at, id) > ROW(" in node.get("Index Cond", "")
+            for node in nodes(plan)
+        ), plan
+        assert all("ROW(" not in node.get("Filter", "") for node in scans(plan))
+    await assert_seeks_to_cursor(connection, statements)
+
+
+async def test_shared_todo_queries_use_indexes(connection, repository_statements):
+    session, statements = repository_statements
+    repository = SharedTodoRepository(session)
+    user_id = await owner(connection)
+    await repository.get_shared_todos(user_id, 0, 10)
+    await repository.get_shared_todos(user_id, 0, 10, after=1)
+    keyset = statements[-1:]
+    await repository.get_shared_todo_by_id(1, user_id)
+    await assert_uses_indexes(connection, statements)
+    await assert_seeks_to_cursor(connection, keyset)
+
+
+async def test_search_queries_use_indexes(connection, repository_statements):
+    session, statements = repository_statements
+    repository = SearchRepository(session)
+    user_id = await owner(connection)
+    assert await repository.search_tasks(user_id, "task 3", 10)
+    assert await repository.search_todos(user_id, "todo", 10)
+    await assert_uses_indexes(connection, statements)
+
+
+async def test_open_tasks_use_the_partial_index(connection, repository_statements):
+    session, statements = repository_statements
+    repository = TaskRepository(session)
+    user_id = await owner(connection)
+    await repository.get_tasks(user_id, 0, 10, filters={"completed": False})
+    statement, parameters = statements[-1]
+    plan = await explain(connection, statement, parameters)
+    assert {node.get("Index Name") for node in scans(plan)} == {"ix_task_owner_id_open"}
+
+
+async def test_sync_queries_use_indexes(connection, repository_statements):
+    session, statements = repository_statements
+    repository = SyncRepository(session)
+    user_id = await owner(connection)
+    for after in (None, (1, 1)):
+        await repository.get_changed_todos(user_id, after, 10)
+        await repository.get_changed_tasks(user_id, after, 10)
+        await repository.get_changed_shared_todos(user_id, after, 10)
+        await repository.get_tombstones(user_id, after, 10)
+    await assert_uses_indexes(connection, statements)
+    # A bitmap scan of the owner's handful of seeded rows costs less, what
+    # matters is that an index can seek to the cursor once there are many
+    await connection.execute(text("SET LOCAL enable_bitmapscan = off"))
+    await assert_seeks_to_cursor(connection, statements[-4:])
@@ -9,8 +9,9 @@ faker = Faker()
 def test_client():
     from main import app
 
-    client = TestClient(app)
-    yield client
+    # Runs the lifespan, the pools then live on the client's event loop
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -0,0 +1,42 @@
+import pytest
+from faker import Faker
+
+from app.user.cache import user_cache
+from app.user.models.user import User, UserDB
+from core.db import session_factory
+
+faker = Faker()
+
+
+@pytest.fixture
+async def user_id():
+    async with session_factory() as session:
+        user = await UserDB(session, User).create(
+            {
+                "email": faker.email(),
+                "username": faker.user_name() + faker.pystr(max_chars=6),
+                "hashed_password": faker.password(),
+            }
+        )
+        return user.id
+
+
+async def test_get_is_cached_until_updated(user_id):
+    misses = user_cache.misses
+    async with session_factory() as session:
+        assert (await UserDB(session, User).get(user_id)).id == user_id
+        assert user_cache.misses == misses + 1
+
+    async with session_factory() as session:
+        user_db = UserDB(session, User)
+        hits = user_cache.hits
+        cached = await user_db.get(user_id)
+        assert user_cache.hits == hits + 1
+        assert cached.is_active is True
+
+        await user_db.update(cached, {"is_active": False})
+
+    async with session_factory() as session:
+        user = await UserDB(session, User).get(user_id)
+        assert user_cache.misses == misses + 2
+        assert user.is_active is False